@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Benchmark the vault index on a synthetic vault.
+
+Generates N markdown notes (default 100k), then times a cold build, a no-op
+incremental update, an update after editing 1% of notes, and query latency.
+
+Usage: bench_vault_index.py [--notes N] [--queries N] [--dir PATH] [--keep]
+"""
+
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+# Any lib module that pulls in usage_tracker creates a tracker (ledger,
+# budget DB, anomaly state) in SECOND_BRAIN_USAGE_DIR; keep it off the real one
+_USAGE_SCRATCH = tempfile.TemporaryDirectory(prefix="second-brain-bench-usage-")
+os.environ["SECOND_BRAIN_USAGE_DIR"] = _USAGE_SCRATCH.name
+
+from vault_index import VaultIndex
+
+VOCAB_SIZE = 20000
+WORDS_PER_NOTE = 200
+SEED = 1729
+
+
+def make_vocab(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(VOCAB_SIZE)]
+
+
+def make_note(rng, vocab, weights, i):
+    words = rng.choices(vocab, cum_weights=weights, k=WORDS_PER_NOTE)
+    paragraphs = [" ".join(words[j:j + 40]) for j in range(0, len(words), 40)]
+    return f'---\ntitle: "Note {i} {words[0]} {words[1]}"\n---\n\n# Note {i}\n\n' + "\n\n".join(paragraphs) + "\n"
+
+
+def generate(root: Path, notes: int, rng, vocab, weights):
+    for i in range(notes):
+        folder = root / f"journal-{i // 1000:03d}"
+        if i % 1000 == 0:
+            folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"note-{i:06d}.md").write_text(make_note(rng, vocab, weights, i))
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def main():
+    args = sys.argv[1:]
+    notes, queries, base, keep = 100_000, 200, None, False
+    while args:
+        arg = args.pop(0)
+        if arg == "--notes":
+            notes = int(args.pop(0))
+        elif arg == "--queries":
+            queries = int(args.pop(0))
+        elif arg == "--dir":
+            base = Path(args.pop(0))
+        elif arg == "--keep":
+            keep = True
+
+    rng = random.Random(SEED)
+    vocab = make_vocab(rng)
+    # Zipf-like word frequencies, precomputed as cumulative weights
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCAB_SIZE)))
+
+    work = Path(tempfile.mkdtemp(dir=base, prefix="vault-bench-"))
+    vault = work / "vault"
+    results = {"notes": notes}
+    try:
+        start = time.perf_counter()
+        generate(vault, notes, rng, vocab, weights)
+        results["generate_s"] = round(time.perf_counter() - start, 2)
+
+        index = VaultIndex(work / "index.db", [vault])
+        results["cold_build"] = index.update()
+        results["noop_update"] = index.update()
+
+        edited = rng.sample(sorted(vault.rglob("*.md")), max(1, notes // 100))
+        for path in edited:
+            path.write_text(make_note(rng, vocab, weights, -1))
+        results["incremental_update"] = index.update()
+
+        latencies = []
+        for _ in range(queries):
+            # Mix common and rarer terms, one or two words per query
+            terms = rng.choices(vocab[:2000], k=rng.randint(1, 2))
+            start = time.perf_counter()
+            index.search(" ".join(terms))
+            latencies.append((time.perf_counter() - start) * 1000)
+        results["query_ms"] = {
+            "p50": round(statistics.median(latencies), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "max": round(max(latencies), 2),
+        }
+        results["index"] = index.stats()
+        index.close()
+    finally:
+        if not keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
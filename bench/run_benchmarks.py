@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""Benchmarks for the Python hot paths.
+
+Covers usage logging at different day sizes, service summaries over 30/365
+days (plain and archived), posting state-file updates, batch image
+generation against a local fake fal.ai HTTP server, and `second-brain` CLI
+startup time. Results are written to
+bench/results/<timestamp>-<commit>.json so runs can be compared.
+
+Usage:
+  run_benchmarks.py [--quick] [--only NAME[,NAME]] [--out PATH]
+  run_benchmarks.py --compare BASELINE.json CURRENT.json
+"""
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "lib"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+# Importing usage_tracker creates a tracker (ledger, budget DB, anomaly state)
+# in SECOND_BRAIN_USAGE_DIR; keep benchmarks away from the real one
+_USAGE_SCRATCH = tempfile.TemporaryDirectory(prefix="second-brain-bench-usage-")
+os.environ["SECOND_BRAIN_USAGE_DIR"] = _USAGE_SCRATCH.name
+
+RESULTS_DIR = ROOT / "bench" / "results"
+SERVICES = ["fal.ai (Images)", "fal.ai (Video)", "ElevenLabs", "OpenAI", "Kimi K2.5"]
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def timed(fn, repeat: int):
+    """Run fn `repeat` times and summarize wall time in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "runs": repeat,
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def write_day(storage: Path, date: str, events: int, seed: int = 0):
+    import random
+    rng = random.Random(seed)
+    base = datetime.fromisoformat(f"{date}T00:00:00")
+    entries = [{
+        "timestamp": (base + timedelta(seconds=i * 86400 // max(events, 1))).isoformat(),
+        "service": rng.choice(SERVICES),
+        "operation": rng.choice(["image_generation", "video_generation", "chat_completion"]),
+        "cost_usd": round(rng.random() * 0.1, 5),
+        "metadata": {"model": "flux-dev", "prompt_length": rng.randint(10, 200)},
+    } for i in range(events)]
+    with open(storage / f"{date}.json", 'w') as f:
+        json.dump({"entries": entries, "daily_total": sum(e["cost_usd"] for e in entries)}, f, indent=2)
+
+
+# --- usage tracking -------------------------------------------------------
+
+@benchmark("log_usage")
+def bench_log_usage(work: Path, quick: bool):
+    """Per-call latency of log_usage when today's file already holds N events"""
+    from usage_tracker import UsageTracker
+
+    results = {}
+    for size in ([1000, 10000] if quick else [1000, 10000, 100000]):
+        storage = work / f"log-{size}"
+        storage.mkdir()
+        tracker = UsageTracker(str(storage))
+        tracker.auto_compact = False
+        write_day(storage, datetime.now().strftime('%Y-%m-%d'), size)
+        results[f"{size}_events"] = timed(
+            lambda: tracker.log_usage("fal.ai (Images)", "image_generation", 0.003, {"model": "flux-dev"}),
+            repeat=5 if size >= 100000 else 20)
+    return results
+
+
+@benchmark("service_summary")
+def bench_service_summary(work: Path, quick: bool):
+    """get_service_summary over 30 and 365 days, from day files and from the archive"""
+    from usage_tracker import UsageTracker
+
+    per_day = 200 if quick else 1000
+    storage = work / "summary"
+    storage.mkdir()
+    for i in range(365):
+        write_day(storage, (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d'), per_day, seed=i)
+    tracker = UsageTracker(str(storage))
+
+    results = {"events_per_day": per_day}
+    for days in (30, 365):
+        results[f"{days}_days"] = timed(lambda: tracker.get_service_summary(days), repeat=3)
+
+    tracker.archive.compact()
+    for days in (30, 365):
+        results[f"{days}_days_archived"] = timed(lambda: tracker.get_service_summary(days), repeat=3)
+    return results
+
+
+# --- posting state --------------------------------------------------------
+
+@benchmark("state_updates")
+def bench_state_updates(work: Path, quick: bool):
+    """Posting state-file updates (cross_post.record_post and twitter-engage's load/save)"""
+    import cross_post
+
+    state_file = work / "twitter-state.json"
+    shutil.copy(ROOT / "twitter-state.json", state_file)
+    cross_post.STATE_FILES["twitter"] = state_file
+
+    results = {"record_post": timed(lambda: cross_post.record_post("twitter", {"url": "https://x"}),
+                                    repeat=200)}
+
+    # twitter-engage.py imports tweepy at module level; only run when it's installed
+    try:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location("twitter_engage", ROOT / "twitter-engage.py")
+        engage = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(engage)
+    except ImportError as e:
+        results["twitter_engage"] = {"skipped": str(e)}
+    else:
+        home = os.environ.get("HOME")
+        os.environ["HOME"] = str(work)
+        (work / "clawd").mkdir(exist_ok=True)
+        shutil.copy(state_file, work / "clawd" / "twitter-state.json")
+        try:
+            def cycle():
+                state = engage.load_state()
+                state["todayTotalCount"] = state.get("todayTotalCount", 0) + 1
+                engage.save_state(state)
+            results["twitter_engage"] = timed(cycle, repeat=200)
+        finally:
+            if home is not None:
+                os.environ["HOME"] = home
+    return results
+
+
+# --- generation -----------------------------------------------------------
+
+class FakeFalHandler(BaseHTTPRequestHandler):
+    latency = 0.05
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        body = json.dumps({"images": [{"url": "https://fal.media/fake.png"}],
+                           "video": {"url": "https://fal.media/fake.mp4"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def fake_fal_client(base_url: str) -> types.ModuleType:
+    """A fal_client stand-in whose subscribe() POSTs to the local fake server"""
+    import urllib.request
+
+    module = types.ModuleType("fal_client")
+
+    def subscribe(endpoint, arguments, with_logs=False):
+        request = urllib.request.Request(f"{base_url}/{endpoint}", data=json.dumps(arguments).encode(),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+    module.subscribe = subscribe
+    return module
+
+
+@benchmark("batch_generation")
+def bench_batch_generation(work: Path, quick: bool):
+    """Image batches against a fake fal.ai server: sequential, 8 threads, and generate_batch"""
+    import contextlib
+    import importlib.util
+    import io
+    import usage_tracker
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeFalHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved_fal = sys.modules.get("fal_client")
+    sys.modules["fal_client"] = fake_fal_client(f"http://127.0.0.1:{server.server_port}")
+
+    storage = work / "generation"
+    storage.mkdir()
+    saved_tracker = usage_tracker.tracker
+    usage_tracker.tracker = usage_tracker.UsageTracker(str(storage))
+
+    try:
+        spec = importlib.util.spec_from_file_location("multimodal", ROOT / "bin" / "multimodal.py")
+        multimodal = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(multimodal)
+        multimodal.tracker = usage_tracker.tracker
+
+        batch = 8 if quick else 32
+        prompts = [f"mountain lake at dawn #{i}" for i in range(batch)]
+
+        def sequential():
+            for p in prompts:
+                multimodal.generate_image(p)
+
+        def concurrent():
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(multimodal.generate_image, prompts))
+
+        def batched():
+            multimodal.generate_batch("image", prompts)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = {
+                "batch": batch,
+                "server_latency_ms": FakeFalHandler.latency * 1000,
+                "sequential": timed(sequential, repeat=1),
+                "concurrent_8": timed(concurrent, repeat=1),
+                "generate_batch": timed(batched, repeat=1),
+            }
+    finally:
+        usage_tracker.tracker = saved_tracker
+        if saved_fal is None:
+            sys.modules.pop("fal_client", None)
+        else:
+            sys.modules["fal_client"] = saved_fal
+        server.shutdown()
+    return results
+
+
+# --- CLI startup ----------------------------------------------------------
+
+STARTUP_TARGET_MS = 100
+
+
+@benchmark("cli_startup")
+def bench_cli_startup(work: Path, quick: bool):
+    """Wall time of `second-brain` commands in a fresh interpreter"""
+    storage = work / "usage"
+    storage.mkdir()
+    for i in range(7):
+        write_day(storage, (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d'), 50, seed=i)
+    env = {**os.environ, "SECOND_BRAIN_USAGE_DIR": str(storage)}
+    env.pop("SECOND_BRAIN_PROFILE", None)
+
+    cli = str(ROOT / "bin" / "second-brain")
+    commands = {
+        "python": [sys.executable, "-c", "pass"],
+        "help": [sys.executable, cli, "--help"],
+        "usage_today": [sys.executable, cli, "usage", "today"],
+        "usage_summary_7": [sys.executable, cli, "usage", "summary", "7"],
+    }
+    results = {"target_ms": STARTUP_TARGET_MS}
+    for name, argv in commands.items():
+        run = lambda: subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, check=True)
+        run()  # warm the bytecode cache
+        results[name] = timed(run, repeat=5 if quick else 15)
+        results[name]["under_target"] = results[name]["median_ms"] < STARTUP_TARGET_MS
+    return results
+
+
+# --- runner ---------------------------------------------------------------
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def flatten(results, prefix=""):
+    """Yield (path, median_ms) for every timed result"""
+    for key, value in results.items():
+        if isinstance(value, dict) and "median_ms" in value:
+            yield f"{prefix}{key}", value["median_ms"]
+        elif isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{key}.")
+
+
+def compare(baseline_path: str, current_path: str):
+    with open(baseline_path) as f:
+        baseline = dict(flatten(json.load(f)["benchmarks"]))
+    with open(current_path) as f:
+        current = dict(flatten(json.load(f)["benchmarks"]))
+
+    print(f"{'benchmark':<48} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name in sorted(set(baseline) | set(current)):
+        old, new = baseline.get(name), current.get(name)
+        if old is None or new is None:
+            print(f"{name:<48} {old or '-':>10} {new or '-':>10} {'':>8}")
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        flag = "  ⚠️" if change > 10 else ""
+        print(f"{name:<48} {old:>10.3f} {new:>10.3f} {change:>+7.1f}%{flag}")
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--compare"] and len(args) == 3:
+        compare(args[1], args[2])
+        return
+
+    quick = False
+    only = None
+    out = None
+    while args:
+        arg = args.pop(0)
+        if arg == "--quick":
+            quick = True
+        elif arg == "--only":
+            only = args.pop(0).split(",")
+        elif arg == "--out":
+            out = Path(args.pop(0))
+        else:
+            print(__doc__.strip().split("Usage:")[1].rstrip())
+            sys.exit(1)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "benchmarks": {},
+    }
+
+    work = Path(tempfile.mkdtemp(prefix="second-brain-bench-"))
+    try:
+        for name, fn in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            print(f"⏱️  {name}...", file=sys.stderr)
+            (work / name).mkdir()
+            report["benchmarks"][name] = fn(work / name, quick)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    out = out or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report["benchmarks"], indent=2))
+    print(f"\nSaved to {out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,103 +4,122 @@ Multimodal CLI - Generate images and videos
 """
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 sys.path.insert(0, '/Users/adzoboateng/clawd/lib')
 
-from usage_tracker import log_fal_image, log_fal_video
+import providers
+from usage_tracker import BudgetExceeded, tracker
+from tracing import session, span
+
+# CLI media type -> provider in the registry
+KINDS = {
+    "image": "fal-image",
+    "video": "fal-video",
+}
+
+def generate(provider_name: str, prompt: str, model: str = None, **arguments):
+    """Generate media with a registered provider, returning the result URL (None on failure)"""
+    provider = providers.get(provider_name)
+    model = model or provider.default_model
+
+    try:
+        args = provider.arguments(prompt=prompt, **arguments)
+
+        # Wait for one of the provider's slots so batches respect its concurrency limit
+        with provider.slot():
+            # Hold the estimated cost against the budget until usage is logged
+            with tracker.budget_guard(provider.service, provider.cost(model, **args)):
+                start = time.perf_counter()
+                with span("provider.submit", provider=provider.name, endpoint=provider.endpoint(model)):
+                    result = provider.submit(model, args)
+                latency_ms = round((time.perf_counter() - start) * 1000, 1)
+
+                # Log usage (latency feeds the metrics server's histograms)
+                provider.log(tracker, model, prompt_length=len(prompt), latency_ms=latency_ms)
+
+        return provider.result_url(result)
+
+    except BudgetExceeded as e:
+        print(f"💸 Skipped: {e}")
+        return None
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return None
 
 def generate_image(prompt: str, model: str = "flux-dev"):
     """Generate image using fal.ai"""
-    import fal_client
-    
     print(f"🎨 Generating image with {model}...")
     print(f"Prompt: {prompt}")
-    
-    try:
-        # Submit request to fal.ai
-        result = fal_client.subscribe(
-            f"fal-ai/{model}",
-            arguments={
-                "prompt": prompt,
-                "image_size": "landscape_16_9"
-            },
-            with_logs=True
-        )
-        
-        # Log usage
-        log_fal_image(prompt, model)
-        
-        image_url = result["images"][0]["url"]
+
+    image_url = generate(KINDS["image"], prompt, model)
+    if image_url:
         print(f"✅ Image generated!")
         print(f"URL: {image_url}")
-        return image_url
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return None
+    return image_url
 
 def generate_video(prompt: str, model: str = "runway-gen3"):
     """Generate video using fal.ai (Runway)"""
-    import fal_client
-    
     print(f"🎬 Generating video with {model}...")
     print(f"Prompt: {prompt}")
-    
-    try:
-        # Map model names to fal.ai endpoints
-        model_map = {
-            "runway-gen3": "fal-ai/runway-gen3",
-            "luma": "fal-ai/luma",
-            "kling": "fal-ai/kling"
-        }
-        
-        endpoint = model_map.get(model, "fal-ai/runway-gen3")
-        
-        result = fal_client.subscribe(
-            endpoint,
-            arguments={
-                "prompt": prompt,
-                "duration": 5  # seconds
-            },
-            with_logs=True
-        )
-        
-        # Log usage
-        log_fal_video(prompt, model)
-        
-        video_url = result["video"]["url"]
+
+    video_url = generate(KINDS["video"], prompt, model)
+    if video_url:
         print(f"✅ Video generated!")
         print(f"URL: {video_url}")
-        return video_url
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return None
+    return video_url
+
+def generate_batch(kind: str, prompts: list, model: str = None, workers: int = None):
+    """Generate several prompts at once; the provider's slots cap how many run together"""
+    provider_name = KINDS.get(kind, kind)
+    workers = workers or providers.get(provider_name).concurrency
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda prompt: generate(provider_name, prompt, model), prompts))
 
 def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python3 multimodal.py image 'prompt here' [model]")
         print("  python3 multimodal.py video 'prompt here' [model]")
+        print("  python3 multimodal.py batch image|video prompts.txt [model]")
         print("")
-        print("Image models: flux-dev (default), flux-pro, stable-diffusion-xl")
-        print("Video models: runway-gen3 (default), luma, kling")
+        for kind, name in KINDS.items():
+            provider = providers.get(name)
+            models = ", ".join(f"{m} (default)" if m == provider.default_model else m for m in provider.models)
+            print(f"{kind.capitalize()} models: {models} - up to {provider.concurrency} at once")
+        print("Add --profile[=cpu,mem] to write a trace (see lib/tracing.py)")
         sys.exit(1)
-    
+
     command = sys.argv[1]
-    
+
     if command == "image":
         prompt = sys.argv[2]
         model = sys.argv[3] if len(sys.argv) > 3 else "flux-dev"
         generate_image(prompt, model)
-    
+
     elif command == "video":
         prompt = sys.argv[2]
         model = sys.argv[3] if len(sys.argv) > 3 else "runway-gen3"
         generate_video(prompt, model)
-    
+
+    elif command == "batch":
+        kind = sys.argv[2]
+        with open(sys.argv[3], 'r') as f:
+            prompts = [line.strip() for line in f if line.strip()]
+        model = sys.argv[4] if len(sys.argv) > 4 else None
+
+        print(f"📦 Generating {len(prompts)} {kind}(s)...")
+        urls = generate_batch(kind, prompts, model)
+        for prompt, url in zip(prompts, urls):
+            print(f"{'✅' if url else '❌'} {prompt[:60]}")
+            if url:
+                print(f"   {url}")
+        sys.exit(0 if all(urls) else 1)
+
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    with session("multimodal"):
+        main()
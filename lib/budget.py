@@ -0,0 +1,278 @@
+"""
+Budget Guardrails
+Daily/monthly spend limits checked before paid API calls
+
+Running totals live in a small SQLite ledger next to the usage day files,
+so every process shares them and a check is a handful of primary-key
+lookups. A period's total is seeded from the day files the first time it
+is touched. Callers reserve the estimated cost before a call and the
+reservation is settled when the usage is logged, so concurrent jobs can't
+overshoot a budget together.
+
+budgets.json (in the usage directory):
+    {"global": {"daily": 5.0, "monthly": 50.0},
+     "services": {"fal.ai (Video)": {"daily": 2.0}}}
+"""
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import pathlib
+
+from usage_archive import UsageArchive
+
+GLOBAL = "*"
+RESERVATION_TTL = 3600  # seconds before an unsettled reservation is dropped
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS totals (
+    scope TEXT NOT NULL,
+    period TEXT NOT NULL,
+    spent REAL NOT NULL DEFAULT 0,
+    reserved REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, period)
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    id TEXT PRIMARY KEY,
+    service TEXT NOT NULL,
+    day TEXT NOT NULL,
+    month TEXT NOT NULL,
+    amount REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# Reservation currently held by this thread/task, settled by log_usage
+active_reservation = contextvars.ContextVar("active_reservation", default=None)
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, scope: str, period: str, limit: float, committed: float, amount: float):
+        self.scope, self.period, self.limit = scope, period, limit
+        self.committed, self.amount = committed, amount
+        who = "global" if scope == GLOBAL else scope
+        super().__init__(f"{who} {period} budget ${limit:.2f} would be exceeded "
+                         f"(${committed:.2f} committed + ${amount:.2f} requested)")
+
+
+class Reservation:
+    def __init__(self, ledger: "BudgetLedger", id: str, service: str, amount: float):
+        self.ledger = ledger
+        self.id = id
+        self.service = service
+        self.amount = amount
+        self.settled = False
+
+    def commit(self, cost: Optional[float] = None):
+        """Turn the reservation into actual spend (defaults to the reserved amount)"""
+        if not self.settled:
+            self.ledger._settle(self, self.amount if cost is None else cost)
+
+    def release(self):
+        """Give the reserved amount back without spending it"""
+        if not self.settled:
+            self.ledger._settle(self, None)
+
+
+class BudgetLedger:
+    def __init__(self, storage_path: pathlib.Path):
+        self.storage_path = pathlib.Path(storage_path)
+        self.config_file = self.storage_path / "budgets.json"
+        self.db_file = self.storage_path / ".budget.db"
+        self.archive = UsageArchive(self.storage_path)
+        self._config: Dict[str, Any] = {}
+        self._config_mtime = None
+        self._conn = None
+        self._lock = threading.RLock()
+
+    # --- config ------------------------------------------------------------
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """budgets.json, reloaded only when it changes"""
+        try:
+            mtime = self.config_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._config_mtime:
+            self._config_mtime = mtime
+            if mtime is None:
+                self._config = {}
+            else:
+                with open(self.config_file, 'r') as f:
+                    self._config = json.load(f)
+        return self._config
+
+    def limits(self, service: str) -> List[Tuple[str, str, float]]:
+        """(scope, period kind, limit) pairs that apply to a service"""
+        config = self.config
+        out = []
+        for kind, limit in config.get("global", {}).items():
+            out.append((GLOBAL, kind, float(limit)))
+        for kind, limit in config.get("services", {}).get(service, {}).items():
+            out.append((service, kind, float(limit)))
+        return out
+
+    # --- storage -----------------------------------------------------------
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.storage_path.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def _periods(now: Optional[datetime] = None) -> Dict[str, str]:
+        now = now or datetime.now()
+        return {"daily": now.strftime('%Y-%m-%d'), "monthly": now.strftime('%Y-%m')}
+
+    def _rollup(self, scope: str, period: str) -> float:
+        """Sum spend for a scope from the day files and archive index covering a period"""
+        total = 0.0
+        for date, meta in self.archive.index(period[:7]).items():
+            if date.startswith(period):
+                total += meta["daily_total"] if scope == GLOBAL else meta["services"].get(scope, 0.0)
+        for path in self.storage_path.glob(f"{period}*.json"):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if scope == GLOBAL:
+                total += data.get("daily_total", 0.0)
+            else:
+                total += sum(e["cost_usd"] for e in data.get("entries", []) if e["service"] == scope)
+        return total
+
+    def _row(self, scope: str, period: str) -> Tuple[float, float]:
+        row = self.conn.execute("SELECT spent, reserved FROM totals WHERE scope = ? AND period = ?",
+                                (scope, period)).fetchone()
+        if row is None:
+            spent = self._rollup(scope, period)
+            self.conn.execute("INSERT OR IGNORE INTO totals (scope, period, spent) VALUES (?, ?, ?)",
+                              (scope, period, spent))
+            row = self.conn.execute("SELECT spent, reserved FROM totals WHERE scope = ? AND period = ?",
+                                    (scope, period)).fetchone()
+        return row
+
+    def _add(self, scopes, periods, spent: float = 0.0, reserved: float = 0.0):
+        for scope in scopes:
+            for period in periods:
+                self._row(scope, period)
+                self.conn.execute("UPDATE totals SET spent = spent + ?, reserved = MAX(0, reserved + ?) "
+                                  "WHERE scope = ? AND period = ?", (spent, reserved, scope, period))
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _expire(self):
+        cutoff = time.time() - RESERVATION_TTL
+        stale = self.conn.execute("SELECT * FROM reservations WHERE created_at < ?", (cutoff,)).fetchall()
+        for _, service, day, month, amount, _ in stale:
+            self._add((GLOBAL, service), (day, month), reserved=-amount)
+        self.conn.execute("DELETE FROM reservations WHERE created_at < ?", (cutoff,))
+
+    # --- public API --------------------------------------------------------
+
+    def _violation(self, service: str, amount: float) -> Optional[BudgetExceeded]:
+        periods = self._periods()
+        for scope, kind, limit in self.limits(service):
+            spent, reserved = self._row(scope, periods[kind])
+            if spent + reserved + amount > limit + 1e-9:
+                return BudgetExceeded(scope, kind, limit, spent + reserved, amount)
+        return None
+
+    def check(self, service: str, amount: float) -> bool:
+        """Would spending `amount` on `service` stay within every budget?"""
+        if not self.limits(service):
+            return True
+        with self._lock:
+            return self._violation(service, amount) is None
+
+    def reserve(self, service: str, amount: float) -> Reservation:
+        """Hold `amount` against the service's budgets or raise BudgetExceeded"""
+        periods = self._periods()
+        reservation = Reservation(self, uuid.uuid4().hex, service, amount)
+        with self._transaction():
+            self._expire()
+            violation = self._violation(service, amount)
+            if violation:
+                raise violation
+            self.conn.execute("INSERT INTO reservations VALUES (?, ?, ?, ?, ?, ?)",
+                              (reservation.id, service, periods["daily"], periods["monthly"],
+                               amount, time.time()))
+            self._add((GLOBAL, service), periods.values(), reserved=amount)
+        return reservation
+
+    def _settle(self, reservation: Reservation, cost: Optional[float]):
+        with self._transaction():
+            row = self.conn.execute("SELECT day, month FROM reservations WHERE id = ?",
+                                    (reservation.id,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM reservations WHERE id = ?", (reservation.id,))
+                self._add((GLOBAL, reservation.service), row, reserved=-reservation.amount)
+            if cost is not None:
+                self._add((GLOBAL, reservation.service), self._periods().values(), spent=cost)
+        reservation.settled = True
+
+    def record(self, service: str, cost: float):
+        """Add spend that wasn't reserved in advance"""
+        with self._transaction():
+            self._add((GLOBAL, service), self._periods().values(), spent=cost)
+
+    @contextmanager
+    def guard(self, service: str, estimate: float):
+        """Reserve `estimate` for the duration of a paid call.
+
+        Usage logged for `service` inside the block settles the reservation
+        with the actual cost; if nothing is logged the reservation is
+        released.
+        """
+        reservation = self.reserve(service, estimate)
+        token = active_reservation.set(reservation)
+        try:
+            yield reservation
+        finally:
+            active_reservation.reset(token)
+            reservation.release()
+
+    def status(self) -> Dict[str, Any]:
+        """Spend, reservations and remaining budget for every configured limit"""
+        periods = self._periods()
+        config = self.config
+        scopes = [(GLOBAL, config.get("global", {}))] + list(config.get("services", {}).items())
+        out = {}
+        with self._lock:
+            for scope, limits in scopes:
+                for kind, limit in limits.items():
+                    spent, reserved = self._row(scope, periods[kind])
+                    out[f"{'global' if scope == GLOBAL else scope}/{kind}"] = {
+                        "limit": float(limit), "spent": round(spent, 4), "reserved": round(reserved, 4),
+                        "remaining": round(float(limit) - spent - reserved, 4),
+                    }
+        return out
+
+
+__all__ = [
+    'BudgetExceeded',
+    'BudgetLedger',
+    'Reservation',
+    'active_reservation'
+]
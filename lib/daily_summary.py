@@ -0,0 +1,221 @@
+"""
+Daily Summary Generator
+Builds the nightly recap from usage day files and daily journals
+
+Only files that changed since the last run are read: a manifest keeps each
+file's mtime, size and content hash alongside a small digest of what it
+contained, so month-to-date totals come from the cached digests. A usage
+day that grew since it was last reported contributes only the difference
+from its previous digest.
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import pathlib
+
+from tracing import traced
+from usage_archive import UsageArchive
+
+DOCS_ROOT = pathlib.Path("/Users/adzoboateng/clawd/second-brain-docs")
+USAGE_DIR = DOCS_ROOT / "usage"
+JOURNAL_DIRS = [DOCS_ROOT / "daily-journals"]
+MANIFEST_FILE = DOCS_ROOT / ".summary-manifest.json"
+
+HEADING_RE = re.compile(r"^(#{1,3})\s+(.+?)\s*$", re.MULTILINE)
+TITLE_RE = re.compile(r'^title:\s*"?(.+?)"?\s*$', re.MULTILINE)
+
+
+def digest_usage(text: str) -> Dict[str, Any]:
+    """Reduce a usage day file to per-service spend and call counts"""
+    data = json.loads(text)
+    services: Dict[str, Dict[str, float]] = {}
+    for entry in data.get("entries", []):
+        svc = services.setdefault(entry["service"], {"cost": 0.0, "calls": 0})
+        svc["cost"] += entry.get("cost_usd", 0.0)
+        svc["calls"] += 1
+    return {
+        "total": sum(s["cost"] for s in services.values()),
+        "calls": sum(s["calls"] for s in services.values()),
+        "services": services,
+    }
+
+
+def digest_journal(text: str, max_highlights: int = 6) -> Dict[str, Any]:
+    """Reduce a journal to its title and section headings"""
+    title = TITLE_RE.search(text)
+    headings = HEADING_RE.findall(text)
+    if not title and headings and headings[0][0] == "#":
+        title_text = headings[0][1]
+    else:
+        title_text = title.group(1) if title else None
+    highlights = [h for level, h in headings if level != "#" and h != title_text]
+    return {"title": title_text, "highlights": highlights[:max_highlights]}
+
+
+class SummaryGenerator:
+    def __init__(self, usage_dir: pathlib.Path = USAGE_DIR,
+                 journal_dirs: Optional[List[pathlib.Path]] = None,
+                 manifest_file: pathlib.Path = MANIFEST_FILE):
+        self.usage_dir = pathlib.Path(usage_dir)
+        self.journal_dirs = [pathlib.Path(d) for d in (journal_dirs or JOURNAL_DIRS)]
+        self.manifest_file = pathlib.Path(manifest_file)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        return {"last_run": None, "files": {}}
+
+    def save_manifest(self):
+        """Persist the manifest; call once the summary has been delivered"""
+        self.manifest["last_run"] = datetime.now().isoformat()
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_file.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_file)
+
+    def _sources(self):
+        if self.usage_dir.exists():
+            for path in sorted(self.usage_dir.glob("????-??-??.json")):
+                yield "usage", path
+        for directory in self.journal_dirs:
+            if directory.exists():
+                for path in sorted(directory.glob("*.md")):
+                    yield "journal", path
+
+    @traced("summary.scan")
+    def scan(self) -> List[Dict[str, Any]]:
+        """Return manifest records for files added or changed since the last run.
+
+        Unchanged files are detected by mtime and size without being opened;
+        a touched-but-identical file is caught by its hash and not reported.
+        Each returned record carries the digest it replaced as `previous`
+        (None for new files).
+        """
+        files = self.manifest["files"]
+        changed = []
+        seen = set()
+
+        for kind, path in self._sources():
+            key = str(path)
+            seen.add(key)
+            stat = path.stat()
+            record = files.get(key)
+            if record and record["mtime_ns"] == stat.st_mtime_ns and record["size"] == stat.st_size:
+                continue
+
+            raw = path.read_bytes()
+            sha = hashlib.sha256(raw).hexdigest()
+            if record and record["sha256"] == sha:
+                record.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                continue
+
+            text = raw.decode("utf-8", errors="replace")
+            try:
+                digest = digest_usage(text) if kind == "usage" else digest_journal(text)
+            except (ValueError, KeyError):
+                continue
+            record = {
+                "kind": kind,
+                "name": path.stem,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": sha,
+                "digest": digest,
+            }
+            previous = files.get(key, {}).get("digest")
+            files[key] = record
+            changed.append({**record, "previous": previous})
+
+        for key in set(files) - seen:
+            del files[key]
+
+        return changed
+
+    def month_to_date(self, month: Optional[str] = None) -> Dict[str, Any]:
+        """Aggregate spend for a month (YYYY-MM) from cached digests"""
+        month = month or datetime.now().strftime('%Y-%m')
+        total, calls = 0.0, 0
+        seen = set()
+        for record in self.manifest["files"].values():
+            if record["kind"] == "usage" and record["name"].startswith(month):
+                total += record["digest"]["total"]
+                calls += record["digest"]["calls"]
+                seen.add(record["name"])
+        # Compacted days are no longer day files; their totals are in the archive index
+        for date, meta in UsageArchive(self.usage_dir).index(month).items():
+            if date not in seen:
+                total += meta["daily_total"]
+                calls += meta["entries"]
+        return {"month": month, "total": total, "calls": calls}
+
+    def generate(self) -> Dict[str, Any]:
+        """Scan for changes and aggregate them into a report"""
+        changed = self.scan()
+        usage = sorted((r for r in changed if r["kind"] == "usage"), key=lambda r: r["name"])
+        journals = sorted((r for r in changed if r["kind"] == "journal"), key=lambda r: r["name"])
+
+        services: Dict[str, Dict[str, float]] = {}
+        for record in usage:
+            # A day reported before only contributes what was logged since
+            previous = (record["previous"] or {}).get("services", {})
+            for name in set(record["digest"]["services"]) | set(previous):
+                new = record["digest"]["services"].get(name, {"cost": 0.0, "calls": 0})
+                old = previous.get(name, {"cost": 0.0, "calls": 0})
+                agg = services.setdefault(name, {"cost": 0.0, "calls": 0})
+                agg["cost"] += new["cost"] - old["cost"]
+                agg["calls"] += new["calls"] - old["calls"]
+        services = {name: svc for name, svc in services.items()
+                    if svc["calls"] or abs(svc["cost"]) > 1e-9}
+
+        return {
+            "since": self.manifest["last_run"],
+            "usage_days": [r["name"] for r in usage],
+            "services": services,
+            "total": sum(s["cost"] for s in services.values()),
+            "journals": [{"name": r["name"], **r["digest"]} for r in journals],
+            "month_to_date": self.month_to_date(),
+        }
+
+
+def render_content(report: Dict[str, Any]) -> str:
+    """Render a report as the markdown body of the daily-summary template"""
+    lines = ["## 💸 API Spend", ""]
+    if report["services"]:
+        days = ", ".join(report["usage_days"])
+        lines.append(f"**Days covered:** {days}")
+        lines.append("")
+        ranked = sorted(report["services"].items(), key=lambda kv: kv[1]["cost"], reverse=True)
+        for name, svc in ranked:
+            lines.append(f"- {name}: ${svc['cost']:.2f} ({svc['calls']} calls)")
+        lines.append("")
+        lines.append(f"**Total:** ${report['total']:.2f}")
+    else:
+        lines.append("No new API usage.")
+    mtd = report["month_to_date"]
+    lines.append(f"**Month to date ({mtd['month']}):** ${mtd['total']:.2f} across {mtd['calls']} calls")
+
+    lines += ["", "---", "", "## 📝 Journal", ""]
+    if report["journals"]:
+        for journal in report["journals"]:
+            lines.append(f"### {journal['title'] or journal['name']}")
+            for highlight in journal["highlights"]:
+                lines.append(f"- {highlight}")
+            lines.append("")
+    else:
+        lines.append("No new journal entries.")
+
+    return "\n".join(lines).rstrip()
+
+
+__all__ = [
+    'SummaryGenerator',
+    'digest_journal',
+    'digest_usage',
+    'render_content'
+]
@@ -0,0 +1,192 @@
+"""
+Google Credential Manager
+Shared OAuth credentials for every Google-using script
+
+Credentials are loaded once per process, refreshed by a background thread
+shortly before they expire, and stored as JSON (not pickle) with atomic
+writes. Asking for a scope that hasn't been granted yet runs an incremental
+authorization that keeps the existing grants.
+"""
+import json
+import os
+import pickle
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+import pathlib
+
+CONFIG_DIR = pathlib.Path.home() / ".config" / "google"
+TOKEN_FILE = CONFIG_DIR / "token.json"
+LEGACY_TOKEN_FILE = CONFIG_DIR / "token.pickle"
+CREDENTIALS_FILE = CONFIG_DIR / "credentials.json"
+
+DEFAULT_SCOPES = [
+    'https://www.googleapis.com/auth/calendar',
+    'https://www.googleapis.com/auth/documents',
+    'https://www.googleapis.com/auth/drive.file'
+]
+
+REFRESH_MARGIN = timedelta(minutes=5)
+RETRY_DELAY = 60  # seconds between failed background refreshes
+
+
+def _expiry(creds) -> Optional[datetime]:
+    """Token expiry as an aware UTC datetime (google-auth stores it naive)"""
+    expiry = creds.expiry
+    if expiry is not None and expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry
+
+
+class CredentialManager:
+    def __init__(self, token_file: pathlib.Path = TOKEN_FILE,
+                 credentials_file: pathlib.Path = CREDENTIALS_FILE,
+                 legacy_token_file: Optional[pathlib.Path] = LEGACY_TOKEN_FILE):
+        self.token_file = pathlib.Path(token_file)
+        self.credentials_file = pathlib.Path(credentials_file)
+        self.legacy_token_file = pathlib.Path(legacy_token_file) if legacy_token_file else None
+        self._creds = None
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    # --- storage -----------------------------------------------------------
+
+    def _load(self):
+        from google.oauth2.credentials import Credentials
+
+        if self.token_file.exists():
+            with open(self.token_file, 'r') as f:
+                info = json.load(f)
+            return Credentials.from_authorized_user_info(info, info.get("scopes"))
+
+        # One-time migration from the old pickle token
+        if self.legacy_token_file and self.legacy_token_file.exists():
+            with open(self.legacy_token_file, 'rb') as f:
+                creds = pickle.load(f)
+            self._save(creds)
+            return creds
+
+        return None
+
+    def _save(self, creds):
+        """Write the token atomically with owner-only permissions"""
+        self.token_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.token_file.parent, prefix=".token-")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(creds.to_json())
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.token_file)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # --- refresh -----------------------------------------------------------
+
+    def _needs_refresh(self, creds) -> bool:
+        if not creds.valid:
+            return True
+        expiry = _expiry(creds)
+        return expiry is not None and expiry - datetime.now(timezone.utc) <= REFRESH_MARGIN
+
+    def _refresh(self, creds):
+        from google.auth.transport.requests import Request
+
+        creds.refresh(Request())
+        self._save(creds)
+
+    def _refresh_loop(self):
+        while True:
+            with self._lock:
+                creds = self._creds
+            expiry = _expiry(creds) if creds is not None else None
+            if expiry is None:
+                delay = None
+            else:
+                delay = (expiry - datetime.now(timezone.utc) - REFRESH_MARGIN).total_seconds()
+                if delay <= 0:
+                    try:
+                        with self._lock:
+                            self._refresh(creds)
+                        continue
+                    except Exception:
+                        delay = RETRY_DELAY
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _start_refresher(self):
+        if self._refresher is None or not self._refresher.is_alive():
+            self._refresher = threading.Thread(target=self._refresh_loop, name="google-token-refresh",
+                                               daemon=True)
+            self._refresher.start()
+        else:
+            self._wake.set()
+
+    # --- authorization -----------------------------------------------------
+
+    def _authorize(self, scopes: List[str]):
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        print("\n🔐 Starting OAuth authorization flow...")
+        print("A browser window will open. Sign in with: adzo@pentridgemedia.com")
+        print("Then authorize the app.\n")
+
+        flow = InstalledAppFlow.from_client_secrets_file(str(self.credentials_file), scopes)
+        creds = flow.run_local_server(port=0, include_granted_scopes='true')
+        self._save(creds)
+        return creds
+
+    def granted_scopes(self) -> List[str]:
+        with self._lock:
+            creds = self._creds or self._load()
+        return sorted(creds.scopes or []) if creds else []
+
+    def get_credentials(self, scopes: Optional[Iterable[str]] = None, interactive: bool = True):
+        """Return valid credentials covering `scopes`.
+
+        The first call loads the token; later calls return the cached copy,
+        which the background thread keeps fresh. Missing scopes are merged
+        into the existing grant rather than replacing it.
+        """
+        wanted = set(scopes or DEFAULT_SCOPES)
+        with self._lock:
+            if self._creds is None:
+                self._creds = self._load()
+
+            creds = self._creds
+            granted = set(creds.scopes or []) if creds else set()
+
+            if creds is None or not creds.refresh_token or not wanted <= granted:
+                if not interactive:
+                    raise PermissionError(f"Google authorization required for: {sorted(wanted - granted)}")
+                creds = self._authorize(sorted(granted | wanted))
+                self._creds = creds
+            elif self._needs_refresh(creds):
+                self._refresh(creds)
+
+        self._start_refresher()
+        return creds
+
+    def add_scopes(self, scopes: Iterable[str]):
+        """Grant additional scopes while keeping the current ones"""
+        return self.get_credentials(set(self.granted_scopes()) | set(scopes))
+
+
+# Process-wide manager shared by every script
+manager = CredentialManager()
+
+
+def get_credentials(scopes: Optional[Iterable[str]] = None, interactive: bool = True):
+    return manager.get_credentials(scopes, interactive)
+
+
+__all__ = [
+    'CredentialManager',
+    'DEFAULT_SCOPES',
+    'TOKEN_FILE',
+    'get_credentials',
+    'manager'
+]
@@ -0,0 +1,364 @@
+"""
+iCalendar Invites
+Builds RFC 5545 events and sends them as AgentMail attachments
+"""
+import base64
+import hashlib
+from calendar import monthrange
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Union
+from zoneinfo import ZoneInfo
+
+from mailer import DEFAULT_INBOX, RateLimiter, get_client, send_one
+
+PRODID = "-//Adzo//Second Brain//EN"
+UID_DOMAIN = "agentmail.to"
+
+
+def escape_text(value: str) -> str:
+    """Escape a TEXT value (RFC 5545 3.3.11)"""
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 3.1)"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(parts)
+
+
+def format_utc(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def format_local(dt: datetime) -> str:
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def format_offset(offset: timedelta) -> str:
+    minutes = int(offset.total_seconds()) // 60
+    sign = "+" if minutes >= 0 else "-"
+    return f"{sign}{abs(minutes) // 60:02d}{abs(minutes) % 60:02d}"
+
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+# Upper bound on the span of one recurrence period, for COUNT-limited rules
+PERIODS = {"SECONDLY": timedelta(seconds=1), "MINUTELY": timedelta(minutes=1),
+           "HOURLY": timedelta(hours=1), "DAILY": timedelta(days=1), "WEEKLY": timedelta(weeks=1),
+           "MONTHLY": timedelta(days=31), "YEARLY": timedelta(days=366)}
+
+
+def transitions(tz: ZoneInfo, year: int) -> List[tuple]:
+    """UTC offset changes within a year as (utc instant, offset before, offset after)"""
+    start = datetime(year, 1, 1, tzinfo=timezone.utc)
+    found = []
+    prev = start.astimezone(tz).utcoffset()
+    for day in range(1, 367):
+        probe = start + timedelta(days=day)
+        offset = probe.astimezone(tz).utcoffset()
+        if offset == prev:
+            continue
+        # Narrow the change down to the minute
+        lo, hi = probe - timedelta(days=1), probe
+        while hi - lo > timedelta(minutes=1):
+            mid = lo + (hi - lo) / 2
+            if mid.astimezone(tz).utcoffset() == prev:
+                lo = mid
+            else:
+                hi = mid
+        found.append((hi.replace(second=0, microsecond=0), prev, offset))
+        prev = offset
+    return found
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> int:
+    """Day of the month of the nth (or, for n < 0, nth-from-last) weekday"""
+    days = [d for d in range(1, monthrange(year, month)[1] + 1)
+            if datetime(year, month, d).weekday() == weekday]
+    return days[n - 1] if n > 0 else days[n]
+
+
+def _yearly_rule(tz: ZoneInfo, year: int, index: int, local: datetime, horizon: int = 10) -> Optional[str]:
+    """An RRULE reproducing a transition every year, if one holds for `horizon` more years"""
+    candidates = [(local.day - 1) // 7 + 1]
+    if (local + timedelta(days=7)).month != local.month:
+        candidates.insert(0, -1)
+
+    for n in candidates:
+        for later in range(year + 1, year + 1 + horizon):
+            found = transitions(tz, later)
+            if len(found) <= index:
+                break
+            at, before, _ = found[index]
+            actual = (at + before).replace(tzinfo=None)
+            expected = local.replace(year=later, day=_nth_weekday(later, local.month, local.weekday(), n))
+            if actual != expected:
+                break
+        else:
+            return f"FREQ=YEARLY;BYMONTH={local.month};BYDAY={n}{WEEKDAYS[local.weekday()]}"
+    return None
+
+
+def vtimezone(tzid: str, year: int, last_year: Optional[int] = None) -> List[str]:
+    """Build a VTIMEZONE with the STANDARD/DAYLIGHT transitions from `year` on.
+
+    Transitions are listed explicitly for every year through `last_year`.
+    Without a last year (an open-ended recurrence), the observances of
+    `year` carry a yearly RRULE instead, so they keep applying afterwards.
+    The observance already in effect on January 1st (the previous year's
+    last transition) is included so events before the first change of
+    `year` resolve too.
+    """
+    tz = ZoneInfo(tzid)
+    open_ended = last_year is None
+    years = range(year, (last_year if not open_ended else year) + 1)
+
+    lines = ["BEGIN:VTIMEZONE", f"TZID:{tzid}"]
+    prior = transitions(tz, year - 1)
+    if prior:
+        observances = [(year - 1, len(prior) - 1, prior[-1])]
+    else:
+        # No change the year before: anchor the offset in effect at the start of `year`
+        start = datetime(year, 1, 1, tzinfo=timezone.utc)
+        offset = start.astimezone(tz).utcoffset()
+        observances = []
+        lines += ["BEGIN:STANDARD", f"DTSTART:{year - 1}0101T000000",
+                  f"TZOFFSETFROM:{format_offset(offset)}", f"TZOFFSETTO:{format_offset(offset)}",
+                  f"TZNAME:{start.astimezone(tz).tzname()}", "END:STANDARD"]
+    observances += [(y, index, t) for y in years for index, t in enumerate(transitions(tz, y))]
+
+    for y, index, (at, before, after) in observances:
+        kind = "DAYLIGHT" if after > before else "STANDARD"
+        local = (at + before).replace(tzinfo=None)
+        lines += [f"BEGIN:{kind}", f"DTSTART:{format_local(local)}"]
+        rule = _yearly_rule(tz, y, index, local) if open_ended and y >= year else None
+        if rule:
+            lines.append(f"RRULE:{rule}")
+        lines += [f"TZOFFSETFROM:{format_offset(before)}", f"TZOFFSETTO:{format_offset(after)}",
+                  f"TZNAME:{at.astimezone(tz).tzname()}", f"END:{kind}"]
+    lines.append("END:VTIMEZONE")
+    return lines
+
+
+@dataclass
+class Attendee:
+    email: str
+    name: Optional[str] = None
+    rsvp: bool = True
+
+    def line(self) -> str:
+        params = ["ROLE=REQ-PARTICIPANT", "PARTSTAT=NEEDS-ACTION", f"RSVP={'TRUE' if self.rsvp else 'FALSE'}"]
+        if self.name:
+            params.insert(0, f'CN="{self.name}"')
+        return f"ATTENDEE;{';'.join(params)}:mailto:{self.email}"
+
+
+@dataclass
+class Event:
+    """A calendar event.
+
+    `start`/`end` must be timezone-aware. With `tzid` set, times are written
+    in that zone with a matching VTIMEZONE; otherwise they are written in UTC.
+    `rrule` is either an RRULE string ("FREQ=WEEKLY;COUNT=4") or a dict.
+    """
+    summary: str
+    start: datetime
+    end: datetime
+    organizer: str = DEFAULT_INBOX
+    attendees: List[Attendee] = field(default_factory=list)
+    description: str = ""
+    location: str = ""
+    tzid: Optional[str] = None
+    rrule: Optional[Union[str, Dict[str, Any]]] = None
+    uid: Optional[str] = None
+    sequence: int = 0
+    status: str = "CONFIRMED"
+
+    def __post_init__(self):
+        if self.start.tzinfo is None or self.end.tzinfo is None:
+            raise ValueError("Event start and end must be timezone-aware")
+        if self.end <= self.start:
+            raise ValueError("Event end must be after start")
+        self.attendees = [a if isinstance(a, Attendee) else Attendee(a) for a in self.attendees]
+        if self.uid is None:
+            self.uid = self.stable_uid()
+
+    def stable_uid(self) -> str:
+        """Derive a UID that is the same every time this event is generated"""
+        key = "|".join([self.organizer, self.summary, format_utc(self.start),
+                        ",".join(sorted(a.email for a in self.attendees))])
+        return f"{hashlib.sha1(key.encode()).hexdigest()}@{UID_DOMAIN}"
+
+    def _rrule(self) -> str:
+        if isinstance(self.rrule, dict):
+            parts = []
+            for key, value in self.rrule.items():
+                if isinstance(value, (list, tuple)):
+                    value = ",".join(str(v) for v in value)
+                elif isinstance(value, datetime):
+                    value = format_utc(value)
+                parts.append(f"{key.upper()}={value}")
+            return ";".join(parts)
+        return self.rrule
+
+    def years(self) -> tuple:
+        """First and last local year the event occurs in (last is None if it never ends)"""
+        tz = ZoneInfo(self.tzid) if self.tzid else timezone.utc
+        first, last = self.start.astimezone(tz).year, self.end.astimezone(tz).year
+        if not self.rrule:
+            return first, last
+
+        parts = dict(part.split("=", 1) for part in self._rrule().upper().split(";") if "=" in part)
+        if "UNTIL" in parts:
+            return first, max(last, int(parts["UNTIL"][:4]))
+        if "COUNT" in parts:
+            period = PERIODS.get(parts.get("FREQ"), PERIODS["YEARLY"])
+            span = period * int(parts["COUNT"]) * int(parts.get("INTERVAL", 1))
+            return first, (self.end + span).astimezone(tz).year
+        return first, None
+
+    def _datetime(self, name: str, dt: datetime) -> str:
+        if self.tzid:
+            return f"{name};TZID={self.tzid}:{format_local(dt.astimezone(ZoneInfo(self.tzid)))}"
+        return f"{name}:{format_utc(dt)}"
+
+    def lines(self, dtstamp: Optional[datetime] = None) -> List[str]:
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{self.uid}",
+            f"DTSTAMP:{format_utc(dtstamp or datetime.now(timezone.utc))}",
+            self._datetime("DTSTART", self.start),
+            self._datetime("DTEND", self.end),
+        ]
+        if self.rrule:
+            lines.append(f"RRULE:{self._rrule()}")
+        lines.append(f"SUMMARY:{escape_text(self.summary)}")
+        if self.description:
+            lines.append(f"DESCRIPTION:{escape_text(self.description)}")
+        if self.location:
+            lines.append(f"LOCATION:{escape_text(self.location)}")
+        lines.append(f"ORGANIZER:mailto:{self.organizer}")
+        lines += [a.line() for a in self.attendees]
+        lines += [f"SEQUENCE:{self.sequence}", f"STATUS:{self.status}", "END:VEVENT"]
+        return lines
+
+
+def calendar(events: List[Event], method: str = "REQUEST") -> str:
+    """Serialize events into a VCALENDAR document with CRLF line endings"""
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN", f"METHOD:{method}"]
+    # One VTIMEZONE per zone, covering every year its events recur in
+    zones: Dict[str, List[Optional[int]]] = {}
+    for event in events:
+        if event.tzid:
+            first, last = event.years()
+            if event.tzid not in zones:
+                zones[event.tzid] = [first, last]
+            else:
+                span = zones[event.tzid]
+                span[0] = min(span[0], first)
+                span[1] = None if span[1] is None or last is None else max(span[1], last)
+    for tzid, (first, last) in sorted(zones.items()):
+        lines += vtimezone(tzid, first, last)
+    for event in events:
+        lines += event.lines()
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(fold(line) for line in lines) + "\r\n"
+
+
+def invite_body(event: Event) -> str:
+    local = event.start.astimezone(ZoneInfo(event.tzid)) if event.tzid else event.start
+    lines = ["Hi!", "", "You're invited to:", f"📅 {event.summary}",
+             f"🕐 {local.strftime('%B %d, %Y at %I:%M %p %Z')}"]
+    if event.location:
+        lines.append(f"📍 {event.location}")
+    lines += ["", "See attached calendar invite. Just open it to add to your calendar!", "", "— Adzo"]
+    return "\n".join(lines) + "\n"
+
+
+def attachment(event: Event, filename: str = "invite.ics") -> Dict[str, str]:
+    """Encode an event as an AgentMail attachment"""
+    return {
+        "filename": filename,
+        "content": base64.b64encode(calendar([event]).encode("utf-8")).decode("ascii"),
+        "content_type": "text/calendar; charset=utf-8; method=REQUEST",
+    }
+
+
+def send_invite(event: Event, client=None, inbox_id: Optional[str] = None,
+                limiter: Optional[RateLimiter] = None, retries: int = 3) -> List[Dict[str, Any]]:
+    """Email an event to each attendee with the .ics attached"""
+    client = client or get_client()
+    message = {
+        "subject": f"Invitation: {event.summary}",
+        "text": invite_body(event),
+        "attachments": [attachment(event)],
+    }
+    return [send_one(client, inbox_id or event.organizer, a.email, message, limiter, retries)
+            for a in event.attendees]
+
+
+def schedule_batch(events: List[Event], client=None, max_workers: int = 8,
+                   rate: float = 5.0, retries: int = 3) -> List[Dict[str, Any]]:
+    """Send many invites concurrently through a bounded, rate-limited pool.
+
+    Returns:
+        One result per event with its UID and per-attendee delivery results
+    """
+    client = client or get_client()
+    limiter = RateLimiter(rate)
+
+    def schedule(event: Event) -> Dict[str, Any]:
+        deliveries = send_invite(event, client, limiter=limiter, retries=retries)
+        return {"uid": event.uid, "summary": event.summary,
+                "success": all(d["success"] for d in deliveries), "deliveries": deliveries}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(schedule, events))
+
+
+def event_from_dict(data: Dict[str, Any]) -> Event:
+    """Build an Event from JSON: ISO start, `duration_minutes` or ISO end, attendee emails"""
+    tzid = data.get("tzid")
+    start = datetime.fromisoformat(data["start"])
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=ZoneInfo(tzid) if tzid else timezone.utc)
+    if "end" in data:
+        end = datetime.fromisoformat(data["end"])
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=start.tzinfo)
+    else:
+        end = start + timedelta(minutes=data.get("duration_minutes", 60))
+    attendees = [Attendee(a) if isinstance(a, str) else Attendee(**a) for a in data.get("attendees", [])]
+    return Event(
+        summary=data["summary"], start=start, end=end,
+        organizer=data.get("organizer", DEFAULT_INBOX), attendees=attendees,
+        description=data.get("description", ""), location=data.get("location", ""),
+        tzid=tzid, rrule=data.get("rrule"), uid=data.get("uid"),
+    )
+
+
+__all__ = [
+    'Attendee',
+    'Event',
+    'attachment',
+    'calendar',
+    'escape_text',
+    'event_from_dict',
+    'fold',
+    'schedule_batch',
+    'send_invite'
+]
@@ -0,0 +1,232 @@
+"""
+Bulk Mailer
+Renders templates and sends them through AgentMail to many recipients
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from string import Template
+from typing import Dict, Any, List, Optional
+import pathlib
+
+from tracing import traced
+
+DEFAULT_INBOX = "agentadzo@agentmail.to"
+TEMPLATE_DIR = pathlib.Path(__file__).resolve().parent.parent / "templates"
+DELIVERY_LOG = pathlib.Path("/Users/adzoboateng/clawd/second-brain-docs/mail/deliveries.jsonl")
+CREDENTIALS_FILE = pathlib.Path.home() / ".config" / "agentmail" / "credentials.json"
+
+
+def load_api_key() -> str:
+    """Read the AgentMail API key from the environment or ~/.config/agentmail"""
+    if os.environ.get("AGENTMAIL_API_KEY"):
+        return os.environ["AGENTMAIL_API_KEY"]
+    with open(CREDENTIALS_FILE, 'r') as f:
+        return json.load(f)["api_key"]
+
+
+def get_client(api_key: Optional[str] = None):
+    """Create an AgentMail client"""
+    from agentmail import AgentMail
+    return AgentMail(api_key=api_key or load_api_key())
+
+
+class FakeAgentMail:
+    """Stand-in for AgentMail that records sends instead of delivering them.
+
+    Used for --dry-run; `fail_first` makes the first N sends to each
+    recipient raise so retry handling can be exercised.
+    """
+
+    def __init__(self, fail_first: int = 0, delay: float = 0.0):
+        self.sent: List[Dict[str, Any]] = []
+        self.fail_first = fail_first
+        self.delay = delay
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.inboxes = self
+        self.messages = self
+
+    def send(self, inbox_id: str, to: str, subject: str, text: str, **kwargs):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self._attempts[to] = self._attempts.get(to, 0) + 1
+            if self._attempts[to] <= self.fail_first:
+                raise ConnectionError(f"simulated failure sending to {to}")
+            message = {"inbox_id": inbox_id, "to": to, "subject": subject, "text": text, **kwargs}
+            self.sent.append(message)
+        return {"message_id": f"fake-{len(self.sent)}"}
+
+
+class MailTemplate:
+    """An email template: a `Subject:` line, a blank line, then the body.
+
+    Placeholders use string.Template syntax ($name / ${name}).
+    """
+
+    def __init__(self, subject: str, body: str):
+        self.subject = Template(subject)
+        self.body = Template(body)
+
+    @classmethod
+    def load(cls, name_or_path: str) -> "MailTemplate":
+        path = pathlib.Path(name_or_path)
+        if not path.exists():
+            path = TEMPLATE_DIR / f"{name_or_path}.md"
+        text = path.read_text()
+        header, _, body = text.partition("\n\n")
+        if not header.startswith("Subject:"):
+            raise ValueError(f"Template {path} must start with a 'Subject:' line")
+        return cls(header[len("Subject:"):].strip(), body)
+
+    def render(self, data: Dict[str, Any]) -> Dict[str, str]:
+        """Render subject and body; raises KeyError on a missing variable"""
+        return {
+            "subject": self.subject.substitute(data),
+            "text": self.body.substitute(data),
+        }
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at most `rate` per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def load_recipients(path: str) -> List[Dict[str, Any]]:
+    """Load recipients from a JSON list or a CSV file with an `email` column"""
+    path = pathlib.Path(path)
+    if path.suffix == ".csv":
+        import csv
+        with open(path, newline='') as f:
+            return list(csv.DictReader(f))
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data["recipients"] if isinstance(data, dict) else data
+
+
+@traced("mail.send_one")
+def send_one(client, inbox_id: str, to: str, message: Dict[str, Any],
+             limiter: Optional[RateLimiter] = None, retries: int = 3,
+             backoff: float = 1.0) -> Dict[str, Any]:
+    """Send one message with retries and exponential backoff"""
+    result = {"to": to, "subject": message["subject"], "attempts": 0}
+    start = time.perf_counter()
+
+    for attempt in range(1, retries + 2):
+        result["attempts"] = attempt
+        if limiter:
+            limiter.wait()
+        try:
+            response = client.inboxes.messages.send(inbox_id=inbox_id, to=to, **message)
+            result.update(success=True, response=str(response))
+            break
+        except Exception as e:
+            result.update(success=False, error=str(e))
+            if attempt <= retries:
+                time.sleep(backoff * 2 ** (attempt - 1))
+
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    result["timestamp"] = datetime.now().isoformat()
+    return result
+
+
+def send_bulk(template: MailTemplate, recipients: List[Dict[str, Any]],
+              client=None, inbox_id: str = DEFAULT_INBOX,
+              shared: Optional[Dict[str, Any]] = None,
+              attachments: Optional[List[Dict[str, Any]]] = None,
+              max_workers: int = 8, rate: float = 5.0, retries: int = 3,
+              backoff: float = 1.0,
+              log_path: Optional[pathlib.Path] = DELIVERY_LOG) -> List[Dict[str, Any]]:
+    """Render a template per recipient and send them concurrently.
+
+    Args:
+        template: Template to render
+        recipients: Dicts with an `email` key plus per-recipient variables
+        client: AgentMail client (or FakeAgentMail); created when omitted
+        inbox_id: Sending inbox
+        shared: Variables common to every recipient
+        attachments: Attachments added to every message
+        max_workers: Size of the send pool
+        rate: Maximum sends per second across the pool (0 = unlimited)
+        retries: Retries per recipient after the first attempt
+        backoff: Initial retry delay in seconds
+        log_path: JSONL delivery log, or None to skip logging
+
+    Returns:
+        One result dict per recipient, in input order. Each result is
+        appended to the log as soon as its send finishes, so an interrupted
+        run still records what was delivered.
+    """
+    client = client or get_client()
+    limiter = RateLimiter(rate)
+
+    def deliver(recipient: Dict[str, Any]) -> Dict[str, Any]:
+        to = recipient.get("email")
+        if not to:
+            return {"to": None, "success": False, "attempts": 0, "error": "missing email",
+                    "recipient": recipient, "timestamp": datetime.now().isoformat()}
+        try:
+            message = template.render({**(shared or {}), **recipient})
+        except (KeyError, ValueError) as e:
+            return {"to": to, "success": False, "attempts": 0,
+                    "error": f"template error: {e}", "timestamp": datetime.now().isoformat()}
+        if attachments:
+            message["attachments"] = attachments
+        return send_one(client, inbox_id, to, message, limiter, retries, backoff)
+
+    log = None
+    if log_path:
+        log_path = pathlib.Path(log_path)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        log = open(log_path, 'a')
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(recipients)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(deliver, r): i for i, r in enumerate(recipients)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"to": recipients[i].get("email"), "success": False, "attempts": 0,
+                              "error": str(e), "timestamp": datetime.now().isoformat()}
+                results[i] = result
+                if log:
+                    log.write(json.dumps(result, default=str) + "\n")
+                    log.flush()
+    finally:
+        if log:
+            log.close()
+
+    return results
+
+
+__all__ = [
+    'FakeAgentMail',
+    'MailTemplate',
+    'RateLimiter',
+    'get_client',
+    'load_api_key',
+    'load_recipients',
+    'send_bulk',
+    'send_one'
+]
@@ -0,0 +1,254 @@
+"""
+Providers
+Registry of paid API backends: endpoints, arguments, pricing and limits
+
+Each `Provider` declares the usage-tracker service it bills under, its
+models (endpoint and price), an argument schema, a cost model and how
+many calls may be in flight at once. Callers route through the registry
+instead of hard-coding endpoints and prices:
+
+    provider = providers.get("fal-image")
+    args = provider.arguments(prompt="...")
+    with provider.slot():
+        result = provider.submit("flux-dev", args)
+    provider.log(tracker, "flux-dev", prompt_length=len(prompt))
+
+A new backend plugs in with `register(Provider(...))`; providers with a
+`transport` can also be submitted to, the rest are usage/cost only.
+"""
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+REQUIRED = object()
+
+
+@dataclass
+class Arg:
+    type: type = str
+    default: Any = REQUIRED
+    choices: Optional[Tuple] = None
+
+
+@dataclass
+class Model:
+    price: float
+    endpoint: Optional[str] = None
+
+
+@dataclass
+class Provider:
+    """A backend, billed as `price * usage[unit] / per` (or `price` per call without a unit)"""
+    name: str
+    service: str
+    operation: str
+    models: Dict[str, Model] = field(default_factory=dict)
+    default_model: Optional[str] = None
+    default_price: float = 0.0
+    unit: Optional[str] = None
+    per: float = 1.0
+    schema: Dict[str, Arg] = field(default_factory=dict)
+    concurrency: int = 4
+    transport: Optional[str] = None
+    endpoint_prefix: Optional[str] = None  # unknown models route to prefix + model
+    output: Tuple = ()  # path to the result URL in a response
+
+    def __post_init__(self):
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+
+    # --- routing -----------------------------------------------------------
+
+    def model(self, name: Optional[str] = None) -> Optional[Model]:
+        return self.models.get(name or self.default_model)
+
+    def endpoint(self, model: Optional[str] = None) -> str:
+        model = model or self.default_model
+        if model in self.models and self.models[model].endpoint:
+            return self.models[model].endpoint
+        if self.endpoint_prefix:
+            return f"{self.endpoint_prefix}{model}"
+        return self.models[self.default_model].endpoint
+
+    def arguments(self, **kwargs) -> Dict[str, Any]:
+        """Validate request arguments against the schema, filling defaults"""
+        unknown = set(kwargs) - set(self.schema)
+        if unknown:
+            raise ValueError(f"{self.name}: unknown argument(s) {', '.join(sorted(unknown))}")
+        args = {}
+        for name, spec in self.schema.items():
+            if name in kwargs:
+                value = kwargs[name]
+            elif spec.default is REQUIRED:
+                raise ValueError(f"{self.name}: missing required argument '{name}'")
+            else:
+                value = spec.default
+            if not isinstance(value, spec.type):
+                try:
+                    value = spec.type(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"{self.name}: '{name}' must be {spec.type.__name__}") from None
+            if spec.choices and value not in spec.choices:
+                raise ValueError(f"{self.name}: '{name}' must be one of {', '.join(map(str, spec.choices))}")
+            args[name] = value
+        return args
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one of the provider's concurrency slots"""
+        with self._slots:
+            yield
+
+    def submit(self, model: Optional[str], arguments: Dict[str, Any]) -> Dict[str, Any]:
+        if self.transport is None:
+            raise ValueError(f"{self.name} has no transport; it can only be logged")
+        return TRANSPORTS[self.transport](self.endpoint(model), arguments)
+
+    def result_url(self, response: Dict[str, Any]) -> Any:
+        value = response
+        for key in self.output:
+            value = value[key]
+        return value
+
+    # --- cost --------------------------------------------------------------
+
+    def cost(self, model: Optional[str] = None, **usage) -> float:
+        spec = self.model(model)
+        price = spec.price if spec else self.default_price
+        quantity = usage.get(self.unit, 0) if self.unit else 1
+        return price * quantity / self.per
+
+    def prices(self) -> Dict[str, float]:
+        return {name: m.price for name, m in self.models.items()}
+
+    def log(self, tracker, model: Optional[str] = None, operation: Optional[str] = None, **usage):
+        """Record a call with the usage tracker at its modelled cost"""
+        metadata = dict(usage)
+        if self.models:
+            metadata = {"model": model or self.default_model, **metadata}
+        return tracker.log_usage(
+            service=self.service,
+            operation=operation or self.operation,
+            cost=self.cost(model, **usage),
+            metadata=metadata,
+        )
+
+
+# --- transports ---------------------------------------------------------------
+
+def _fal_subscribe(endpoint: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    import fal_client
+    return fal_client.subscribe(endpoint, arguments=arguments, with_logs=True)
+
+
+TRANSPORTS: Dict[str, Callable[[str, Dict[str, Any]], Dict[str, Any]]] = {
+    "fal": _fal_subscribe,
+}
+
+
+# --- registry -----------------------------------------------------------------
+
+PROVIDERS: Dict[str, Provider] = {}
+
+
+def register(provider: Provider) -> Provider:
+    PROVIDERS[provider.name] = provider
+    return provider
+
+
+def get(name: str) -> Provider:
+    try:
+        return PROVIDERS[name]
+    except KeyError:
+        raise KeyError(f"Unknown provider '{name}' (known: {', '.join(sorted(PROVIDERS))})") from None
+
+
+def by_service(service: str) -> List[Provider]:
+    return [p for p in PROVIDERS.values() if p.service == service]
+
+
+register(Provider(
+    name="fal-image", service="fal.ai (Images)", operation="image_generation",
+    models={
+        "flux-dev": Model(0.003, "fal-ai/flux-dev"),
+        "flux-pro": Model(0.05, "fal-ai/flux-pro"),
+        "stable-diffusion-xl": Model(0.002, "fal-ai/stable-diffusion-xl"),
+    },
+    default_model="flux-dev", default_price=0.003,
+    schema={"prompt": Arg(str), "image_size": Arg(str, "landscape_16_9")},
+    concurrency=4, transport="fal", endpoint_prefix="fal-ai/", output=("images", 0, "url"),
+))
+
+register(Provider(
+    name="fal-video", service="fal.ai (Video)", operation="video_generation",
+    models={
+        "runway-gen3": Model(0.50, "fal-ai/runway-gen3"),
+        "luma": Model(0.30, "fal-ai/luma"),
+        "kling": Model(0.40, "fal-ai/kling"),
+    },
+    default_model="runway-gen3", default_price=0.50,
+    schema={"prompt": Arg(str), "duration": Arg(int, 5)},  # seconds
+    concurrency=2, transport="fal", output=("video", "url"),
+))
+
+# Approximate costs (varies by model)
+register(Provider(
+    name="openai", service="OpenAI", operation="chat_completion",
+    models={
+        "gpt-4": Model(0.03),
+        "gpt-4-turbo": Model(0.01),
+        "gpt-3.5-turbo": Model(0.0015),
+        "dall-e-3": Model(0.04),  # per image
+    },
+    default_model="gpt-4", default_price=0.01, unit="tokens", per=1000,
+))
+
+# ~$0.30 per 1000 characters
+register(Provider(name="elevenlabs", service="ElevenLabs", operation="text_to_speech",
+                  default_price=0.30, unit="characters", per=1000))
+
+register(Provider(name="exa", service="Exa MCP", operation="web_search"))  # Free tier
+
+# Cloud sessions are $0.50 each (cloud_mode counts as 1), local ones are free
+register(Provider(name="browser-use", service="Browser-Use", operation="local_session",
+                  default_price=0.50, unit="cloud_mode"))
+
+register(Provider(
+    name="gemini-image", service="Gemini (Nano Banana)", operation="image_generation",
+    models={
+        "gemini-2.5-flash-image": Model(0.0),  # Free during preview
+        "gemini-3-pro-image-preview": Model(0.0),  # Free during preview
+    },
+    default_model="gemini-2.5-flash-image",
+))
+
+# HeyGen pricing varies, approximate $0.05 per second
+register(Provider(name="heygen", service="HeyGen", operation="video_generation",
+                  models={"talking_photo": Model(0.05)}, default_model="talking_photo",
+                  default_price=0.05, unit="duration_seconds"))
+
+# Runway Gen-3 is ~$0.50 per 5 seconds
+register(Provider(name="runway", service="Runway", operation="video_generation",
+                  models={"gen3": Model(0.50)}, default_model="gen3",
+                  default_price=0.50, unit="duration_seconds", per=5))
+
+# Suno pricing varies, approximate $0.10 per 30 seconds
+register(Provider(name="suno", service="Suno", operation="music_generation",
+                  default_price=0.10, unit="duration_seconds", per=30))
+
+# Kimi K2.5 pricing: ~$0.50 per 1M tokens (input + output avg)
+register(Provider(name="kimi", service="Kimi K2.5", operation="chat_completion",
+                  models={"kimi-k2.5": Model(0.50)}, default_model="kimi-k2.5",
+                  unit="tokens", per=1_000_000))
+
+
+__all__ = [
+    'Arg',
+    'Model',
+    'PROVIDERS',
+    'Provider',
+    'TRANSPORTS',
+    'by_service',
+    'get',
+    'register'
+]
@@ -0,0 +1,368 @@
+"""
+Semantic Search
+Offline vector search over the vault notes
+
+Notes are split into chunks, embedded with a pluggable embedder (a
+model-free hashing embedder by default) and stored as a memory-mapped
+float32 matrix. Top-k cosine search is one matrix-vector product; large
+vaults can add a coarse k-means (IVF) index so only a few clusters are
+scored. Updates are incremental: changed files get new rows appended and
+their old rows tombstoned until the next compaction. Updaters hold a file
+lock, and the vector file is trimmed to the rows recorded in the metadata
+before appending, so an interrupted update can't leave rows misaligned.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import re
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, List, Optional
+import pathlib
+
+import numpy as np
+
+from vault_index import VAULT_ROOTS, extract_title
+
+STORE_DIR = pathlib.Path("/Users/adzoboateng/clawd/second-brain-docs/.semantic")
+
+CHUNK_CHARS = 800
+COMPACT_RATIO = 0.25  # rewrite the matrix once this share of rows is dead
+IVF_MIN_ROWS = 50000  # below this, brute force is already fast enough
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+PARAGRAPH_RE = re.compile(r"\n\s*\n|\n(?=#)")
+
+
+class HashingEmbedder:
+    """Model-free embedder: hashed unigrams and bigrams, sublinear TF, L2-normalized.
+
+    Any object with `name`, `dim` and `embed(texts) -> float32 [n, dim]`
+    can be used instead (e.g. a wrapper around a local sentence model).
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> Iterable[str]:
+        tokens = TOKEN_RE.findall(text.lower())
+        yield from tokens
+        for a, b in zip(tokens, tokens[1:]):
+            yield f"{a} {b}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode())
+                # The top hash bit picks the sign so collisions tend to cancel
+                out[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        out = np.sign(out) * np.log1p(np.abs(out))
+        return normalize(out)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product is cosine similarity"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def chunk_markdown(text: str, max_chars: int = CHUNK_CHARS) -> List[Dict[str, Any]]:
+    """Split markdown on paragraph/heading boundaries into chunks of about max_chars"""
+    if text.startswith("---\n"):
+        end = text.find("\n---", 4)
+        if end != -1:
+            text = text[end + 4:]
+
+    chunks, current, size = [], [], 0
+    for para in PARAGRAPH_RE.split(text):
+        para = para.strip()
+        if not para:
+            continue
+        if current and size + len(para) > max_chars:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(para)
+        size += len(para)
+    if current:
+        chunks.append("\n\n".join(current))
+    return [{"chunk": i, "text": c} for i, c in enumerate(chunks)]
+
+
+class SemanticIndex:
+    def __init__(self, store_dir: pathlib.Path = STORE_DIR,
+                 roots: Optional[Iterable[pathlib.Path]] = None,
+                 embedder=None):
+        self.store_dir = pathlib.Path(store_dir)
+        self.roots = [pathlib.Path(r) for r in (roots or VAULT_ROOTS)]
+        self.embedder = embedder or HashingEmbedder()
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.vectors_file = self.store_dir / "vectors.f32"
+        self.meta_file = self.store_dir / "meta.json"
+        self.ivf_file = self.store_dir / "ivf.npz"
+        self._load()
+
+    # --- storage -----------------------------------------------------------
+
+    def _load(self):
+        meta = None
+        if self.meta_file.exists():
+            with open(self.meta_file, 'r') as f:
+                meta = json.load(f)
+        size = self.vectors_file.stat().st_size if self.vectors_file.exists() else 0
+        self._reset = (not meta or meta.get("embedder") != self.embedder.name
+                       or size < self._vector_bytes(meta))
+        if self._reset:
+            # Different embedder (vectors aren't comparable) or missing vectors: start over.
+            # The files are only rewritten by the next update, under the lock.
+            meta = {"embedder": self.embedder.name, "dim": self.embedder.dim, "rows": [], "files": {}}
+        self.meta = meta
+        self._map()
+
+    @staticmethod
+    def _vector_bytes(meta: Dict[str, Any]) -> int:
+        return len(meta["rows"]) * meta["dim"] * np.dtype(np.float32).itemsize
+
+    @contextmanager
+    def _locked(self):
+        """Serialize updates across processes"""
+        with open(self.store_dir / ".lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _map(self):
+        """Memory-map the vector file and rebuild the live-row mask"""
+        rows = len(self.meta["rows"])
+        dim = self.meta["dim"]
+        if rows:
+            self.matrix = np.memmap(self.vectors_file, dtype=np.float32, mode="r", shape=(rows, dim))
+        else:
+            self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.alive = np.array([r is not None for r in self.meta["rows"]], dtype=bool)
+        self.ivf = None
+        if self.ivf_file.exists():
+            data = np.load(self.ivf_file)
+            if len(data["assign"]) == rows:
+                self.ivf = {"centroids": data["centroids"], "assign": data["assign"]}
+
+    def _save_meta(self):
+        tmp = self.meta_file.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self.meta_file)
+
+    # --- updates -----------------------------------------------------------
+
+    def _files(self):
+        for root in self.roots:
+            if root.exists():
+                yield from root.rglob("*.md")
+
+    def update(self) -> Dict[str, int]:
+        """Embed new and changed notes, tombstone rows of changed or deleted ones"""
+        with self._locked():
+            self._load()  # pick up rows another updater wrote since we loaded
+            return self._update()
+
+    def _update(self) -> Dict[str, int]:
+        if self._reset:
+            self.ivf_file.unlink(missing_ok=True)
+        files = self.meta["files"]
+        rows = self.meta["rows"]
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "chunks": 0}
+        seen = set()
+        touched = False
+        pending_meta, pending_text = [], []
+
+        for path in self._files():
+            key = str(path)
+            seen.add(key)
+            stat = path.stat()
+            record = files.get(key)
+            if record and record["mtime_ns"] == stat.st_mtime_ns and record["size"] == stat.st_size:
+                counts["unchanged"] += 1
+                continue
+
+            raw = path.read_bytes()
+            sha = hashlib.sha256(raw).hexdigest()
+            if record and record["sha256"] == sha:
+                record.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                counts["unchanged"] += 1
+                touched = True
+                continue
+
+            if record:
+                for i in record["rows"]:
+                    rows[i] = None
+                counts["updated"] += 1
+            else:
+                counts["added"] += 1
+
+            text = raw.decode("utf-8", errors="replace")
+            title = extract_title(path, text)
+            chunks = chunk_markdown(text)
+            first = len(rows) + len(pending_meta)
+            files[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha,
+                          "rows": list(range(first, first + len(chunks)))}
+            for c in chunks:
+                pending_meta.append({"path": key, "title": title, "chunk": c["chunk"], "text": c["text"][:300]})
+                pending_text.append(c["text"])
+
+        for key in set(files) - seen:
+            for i in files.pop(key)["rows"]:
+                rows[i] = None
+            counts["removed"] += 1
+
+        if pending_text:
+            vectors = self.embedder.embed(pending_text).astype(np.float32, copy=False)
+            with open(self.vectors_file, 'ab') as f:
+                # Drop orphaned rows an interrupted update appended without saving meta
+                f.truncate(self._vector_bytes(self.meta))
+                f.write(np.ascontiguousarray(vectors).tobytes())
+            rows.extend(pending_meta)
+            counts["chunks"] = len(pending_text)
+
+        if counts["added"] or counts["updated"] or counts["removed"]:
+            self._save_meta()
+            self._map()
+            dead = int((~self.alive).sum())
+            if rows and dead / len(rows) > COMPACT_RATIO:
+                self.compact()
+        elif touched:
+            self._save_meta()  # persist refreshed mtimes
+
+        return counts
+
+    def compact(self):
+        """Drop tombstoned rows and rewrite the matrix"""
+        keep = np.flatnonzero(self.alive)
+        remap = {int(old): new for new, old in enumerate(keep)}
+        live = np.array(self.matrix[keep]) if len(keep) else np.zeros((0, self.meta["dim"]), np.float32)
+
+        tmp = self.vectors_file.with_suffix(".tmp")
+        live.tofile(tmp)
+        self.matrix = None  # release the old mapping before replacing the file
+        os.replace(tmp, self.vectors_file)
+
+        self.meta["rows"] = [self.meta["rows"][i] for i in keep]
+        for record in self.meta["files"].values():
+            record["rows"] = [remap[i] for i in record["rows"]]
+        self._save_meta()
+        self.ivf_file.unlink(missing_ok=True)
+        self._map()
+
+    def build_ivf(self, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        """Cluster rows with k-means for approximate search on large vaults"""
+        n = len(self.meta["rows"])
+        if n == 0:
+            return
+        nlist = nlist or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = self.matrix[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = np.array(sample[rng.choice(len(sample), size=nlist, replace=False)])
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = normalize(centroids)
+
+        assign = np.empty(n, dtype=np.int32)
+        for lo in range(0, n, 65536):  # assign in blocks to bound memory
+            assign[lo:lo + 65536] = np.argmax(self.matrix[lo:lo + 65536] @ centroids.T, axis=1)
+        np.savez(self.ivf_file, centroids=centroids, assign=assign)
+        self.ivf = {"centroids": centroids, "assign": assign}
+
+    # --- search ------------------------------------------------------------
+
+    def search(self, query: str, k: int = 10, nprobe: int = 8) -> List[Dict[str, Any]]:
+        """Return the k chunks most similar to the query.
+
+        Uses the IVF index when one has been built and the vault is large
+        enough; otherwise scores every row in one vectorized product.
+        """
+        if not len(self.meta["rows"]):
+            return []
+        q = self.embedder.embed([query])[0]
+
+        if self.ivf is not None and len(self.meta["rows"]) >= IVF_MIN_ROWS:
+            probe = np.argsort(self.ivf["centroids"] @ q)[-nprobe:]
+            candidates = np.flatnonzero(np.isin(self.ivf["assign"], probe) & self.alive)
+            scores = self.matrix[candidates] @ q
+        else:
+            candidates = None
+            scores = self.matrix @ q
+            scores[~self.alive] = -np.inf
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            if not np.isfinite(scores[i]):
+                break
+            row = int(candidates[i]) if candidates is not None else int(i)
+            meta = self.meta["rows"][row]
+            results.append({"path": meta["path"], "title": meta["title"], "chunk": meta["chunk"],
+                            "snippet": meta["text"], "score": round(float(scores[i]), 4)})
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "embedder": self.meta["embedder"],
+            "files": len(self.meta["files"]),
+            "rows": len(self.meta["rows"]),
+            "live_rows": int(self.alive.sum()),
+            "ivf": self.ivf is not None,
+            "vector_bytes": self.vectors_file.stat().st_size,
+        }
+
+
+def main():
+    import sys
+    import time
+
+    args = sys.argv[1:]
+    index = SemanticIndex()
+    if not args or args[0] == "update":
+        print(json.dumps(index.update(), indent=2))
+    elif args[0] == "search":
+        index.update()
+        start = time.perf_counter()
+        results = index.search(" ".join(args[1:]))
+        for r in results:
+            print(f"{r['score']:>7}  {r['title']} (chunk {r['chunk']})\n         {r['path']}\n         {r['snippet'][:160]}\n")
+        print(f"{len(results)} result(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    elif args[0] == "build-ivf":
+        index.build_ivf(int(args[1]) if len(args) > 1 else None)
+        print(json.dumps(index.stats(), indent=2))
+    elif args[0] == "stats":
+        print(json.dumps(index.stats(), indent=2))
+    else:
+        print("Usage: python3 semantic_search.py [update | search <query> | build-ivf [nlist] | stats]")
+        sys.exit(1)
+
+
+__all__ = [
+    'HashingEmbedder',
+    'SemanticIndex',
+    'chunk_markdown',
+    'normalize'
+]
+
+
+if __name__ == "__main__":
+    from tracing import session
+
+    with session("semantic-search"):
+        main()
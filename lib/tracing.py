@@ -0,0 +1,311 @@
+"""
+Tracing
+Span timing and optional CPU/memory profiling for CLI runs
+
+Wrap an entry point in `session("name")` and interesting code paths in
+`span("name")` or `@traced()`. Nothing is recorded unless the run is
+started with `--profile[=MODES]` or SECOND_BRAIN_PROFILE=MODES, so spans
+cost a single global check in normal runs.
+
+Modes (comma separated):
+  trace  span timings only (what a bare `--profile` or `1` means)
+  cpu    also run cProfile on the main thread
+  mem    also run tracemalloc and record memory per span
+  all    trace,cpu,mem
+
+When the session ends the trace is written to TRACE_DIR as a Chrome trace
+(open in chrome://tracing or ui.perfetto.dev), or as OTLP JSON when
+SECOND_BRAIN_TRACE_FORMAT=otlp. cProfile stats are also saved as `.prof`.
+"""
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Set
+import pathlib
+
+TRACE_DIR = pathlib.Path(os.environ.get("SECOND_BRAIN_TRACE_DIR",
+                                        "/Users/adzoboateng/clawd/second-brain-docs/traces"))
+PROFILE_ENV = "SECOND_BRAIN_PROFILE"
+FORMAT_ENV = "SECOND_BRAIN_TRACE_FORMAT"
+MODES = {"trace", "cpu", "mem"}
+
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Collects finished spans for one session"""
+
+    def __init__(self, name: str, modes: Set[str]):
+        self.name = name
+        self.modes = modes
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: List[Dict[str, Any]] = []
+        self.profiler = None
+        self.memory = None  # the tracemalloc module while mem capture is on
+        self._lock = threading.Lock()
+        self._wall0 = time.time_ns()
+        self._perf0 = time.perf_counter_ns()
+
+    def now_ns(self) -> int:
+        """Wall-clock nanoseconds, monotonic within the session"""
+        return self._wall0 + time.perf_counter_ns() - self._perf0
+
+    def start(self):
+        # Profiler modules load only when requested, keeping CLI startup lean
+        if "mem" in self.modes:
+            import tracemalloc
+            tracemalloc.start()
+            self.memory = tracemalloc
+        if "cpu" in self.modes:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop profilers and return their summaries"""
+        summary: Dict[str, Any] = {}
+        if self.profiler:
+            self.profiler.disable()
+            summary["top_functions"] = top_functions(self.profiler)
+        tracemalloc, self.memory = self.memory, None
+        if tracemalloc:
+            current, peak = tracemalloc.get_traced_memory()
+            summary["memory"] = {"current_kb": current // 1024, "peak_kb": peak // 1024}
+            summary["top_allocations"] = [
+                {"site": str(stat.traceback), "size_kb": stat.size // 1024, "count": stat.count}
+                for stat in tracemalloc.take_snapshot().statistics("lineno")[:15]
+            ]
+            tracemalloc.stop()
+        return summary
+
+    def record(self, span: Dict[str, Any]):
+        with self._lock:
+            self.spans.append(span)
+            if "mem_kb" in span["attrs"]:
+                self.counters.append({"ts": span["end_ns"], "tid": span["tid"],
+                                      "current_kb": span["attrs"]["mem_kb"]})
+
+    # --- output ------------------------------------------------------------
+
+    def chrome_trace(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.name}}]
+        for s in self.spans:
+            args = dict(s["attrs"])
+            if s["error"]:
+                args["error"] = s["error"]
+            events.append({
+                "name": s["name"], "cat": "span", "ph": "X", "pid": pid, "tid": s["tid"],
+                "ts": (s["start_ns"] - self._wall0) / 1000,
+                "dur": (s["end_ns"] - s["start_ns"]) / 1000,
+                "args": args,
+            })
+        for c in self.counters:
+            events.append({"name": "memory", "ph": "C", "pid": pid, "tid": c["tid"],
+                           "ts": (c["ts"] - self._wall0) / 1000, "args": {"current_kb": c["current_kb"]}})
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"session": self.name, "modes": sorted(self.modes),
+                          "started": datetime.fromtimestamp(self._wall0 / 1e9).isoformat(), **summary},
+        }
+
+    def otlp(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        spans = []
+        for s in self.spans:
+            span = {
+                "traceId": self.trace_id,
+                "spanId": s["id"],
+                "name": s["name"],
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(s["start_ns"]),
+                "endTimeUnixNano": str(s["end_ns"]),
+                "attributes": otlp_attributes({**s["attrs"], "thread.id": s["tid"]}),
+                "status": {"code": 2, "message": s["error"]} if s["error"] else {"code": 1},
+            }
+            if s["parent"]:
+                span["parentSpanId"] = s["parent"]
+            spans.append(span)
+        return {"resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({
+                "service.name": self.name,
+                "process.pid": os.getpid(),
+                "profile.summary": json.dumps(summary) if summary else "",
+            })},
+            "scopeSpans": [{"scope": {"name": "second-brain.tracing"}, "spans": spans}],
+        }]}
+
+    def write(self, directory: pathlib.Path = None) -> pathlib.Path:
+        summary = self.stop()
+        directory = pathlib.Path(directory or TRACE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+        if self.profiler:
+            self.profiler.dump_stats(str(directory / f"{stem}.prof"))
+
+        if os.environ.get(FORMAT_ENV, "chrome").lower() == "otlp":
+            path, data = directory / f"{stem}.otlp.json", self.otlp(summary)
+        else:
+            path, data = directory / f"{stem}.trace.json", self.chrome_trace(summary)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return path
+
+
+_active: Optional[Tracer] = None
+
+
+def otlp_attributes(attrs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out = []
+    for key, value in attrs.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        out.append({"key": key, "value": typed})
+    return out
+
+
+def top_functions(profiler, limit: int = 25) -> List[Dict[str, Any]]:
+    """Functions with the most cumulative time"""
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    ranked = sorted(stats.items(), key=lambda kv: kv[1][3], reverse=True)[:limit]
+    return [{
+        "function": f"{func} ({pathlib.Path(file).name}:{line})",
+        "calls": ncalls,
+        "self_ms": round(tottime * 1000, 3),
+        "cumulative_ms": round(cumtime * 1000, 3),
+    } for (file, line, func), (_, ncalls, tottime, cumtime, _) in ranked]
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Dict[str, Any]]:
+    """Time a block. Yields its attribute dict so the block can add results."""
+    tracer = _active
+    if tracer is None:
+        yield attrs
+        return
+
+    span_id = os.urandom(8).hex()
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    memory = tracer.memory
+    mem_before = memory.get_traced_memory()[0] if memory else None
+    start = tracer.now_ns()
+    error = None
+    try:
+        yield attrs
+    except SystemExit as e:
+        # Scripts finish with sys.exit(); only a non-zero status is a failure
+        attrs["exit_code"] = 0 if e.code is None else e.code
+        if e.code not in (0, None):
+            error = f"SystemExit: {e.code}"
+        raise
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        end = tracer.now_ns()
+        _current_span.reset(token)
+        if mem_before is not None and tracer.memory:
+            current = memory.get_traced_memory()[0]
+            attrs["mem_kb"] = current // 1024
+            attrs["mem_delta_kb"] = (current - mem_before) // 1024
+        tracer.record({"id": span_id, "parent": parent, "name": name, "tid": threading.get_native_id(),
+                       "start_ns": start, "end_ns": end, "attrs": attrs, "error": error})
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of span(), named after the function by default"""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return fn(*args, **kwargs)
+            with span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def parse_modes(value: Optional[str]) -> Set[str]:
+    if not value or value.lower() in ("0", "false", "off", "no"):
+        return set()
+    modes = set()
+    for mode in value.lower().split(","):
+        mode = mode.strip()
+        if mode in ("1", "true", "on", "yes", "trace"):
+            modes.add("trace")
+        elif mode == "all":
+            modes |= MODES
+        elif mode in MODES:
+            modes |= {"trace", mode}
+    return modes
+
+
+def pop_profile_flag(argv: List[str]) -> Optional[str]:
+    """Remove --profile[=MODES] from argv (in place) and return its modes"""
+    for i, arg in enumerate(argv[1:], start=1):
+        if arg == "--profile":
+            del argv[i]
+            return "trace"
+        if arg.startswith("--profile="):
+            del argv[i]
+            return arg.split("=", 1)[1]
+    return None
+
+
+@contextmanager
+def session(name: str, argv: Optional[List[str]] = None) -> Iterator[Optional[Tracer]]:
+    """Trace one CLI run if profiling was requested.
+
+    Strips `--profile` from argv before the script parses it, so wrap the
+    whole entry point: `with tracing.session("bulk-mail"): main()`.
+    """
+    global _active
+    argv = sys.argv if argv is None else argv
+    flag = pop_profile_flag(argv)
+    modes = parse_modes(flag if flag is not None else os.environ.get(PROFILE_ENV))
+    if not modes or _active is not None:
+        yield _active
+        return
+
+    tracer = Tracer(name, modes)
+    _active = tracer
+    tracer.start()
+    try:
+        with span(name, argv=" ".join(argv[1:])):
+            yield tracer
+    finally:
+        _active = None
+        path = tracer.write()
+        print(f"📈 Trace written to {path}", file=sys.stderr)
+
+
+__all__ = [
+    'TRACE_DIR',
+    'Tracer',
+    'enabled',
+    'session',
+    'span',
+    'traced'
+]
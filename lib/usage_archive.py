@@ -0,0 +1,162 @@
+"""
+Usage Archive
+Compressed cold storage for closed usage day files
+
+Each month is one `archive/YYYY-MM.json.gz` file made of independent gzip
+members, one per day, plus `YYYY-MM.index.json` recording each day's byte
+range and totals. Reading a day seeks to its member and decompresses only
+that; spend rollups come straight from the index without decompressing.
+"""
+import fcntl
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, Optional
+import pathlib
+
+from tracing import traced
+
+KEEP_DAYS = 7  # recent days stay as plain JSON
+
+
+@contextmanager
+def file_lock(path: pathlib.Path) -> Iterator[None]:
+    """Hold an exclusive flock on `path` (created if missing) across processes"""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class UsageArchive:
+    def __init__(self, storage_path: pathlib.Path):
+        self.storage_path = pathlib.Path(storage_path)
+        self.archive_dir = self.storage_path / "archive"
+        self._indexes: Dict[str, tuple] = {}
+
+    def _data_file(self, month: str) -> pathlib.Path:
+        return self.archive_dir / f"{month}.json.gz"
+
+    def _index_file(self, month: str) -> pathlib.Path:
+        return self.archive_dir / f"{month}.index.json"
+
+    def index(self, month: str) -> Dict[str, Dict[str, Any]]:
+        """Day -> {offset, length, entries, daily_total, services} for a month"""
+        path = self._index_file(month)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        cached = self._indexes.get(month)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r') as f:
+            index = json.load(f)
+        self._indexes[month] = (mtime, index)
+        return index
+
+    def months(self) -> Iterator[str]:
+        if self.archive_dir.exists():
+            for path in sorted(self.archive_dir.glob("*.index.json")):
+                yield path.name[:7]
+
+    def _read_member(self, date: str) -> Optional[Dict[str, Any]]:
+        meta = self.index(date[:7]).get(date)
+        if meta is None:
+            return None
+        with open(self._data_file(date[:7]), 'rb') as f:
+            f.seek(meta["offset"])
+            member = f.read(meta["length"])
+        return json.loads(gzip.decompress(member))
+
+    def read_day(self, date: str) -> Optional[Dict[str, Any]]:
+        """Return a day's data from its JSON file, its archive member, or both.
+
+        A day can have both when something logged to it after it was
+        archived; the two are merged until the next compaction.
+        """
+        path = self.storage_path / f"{date}.json"
+        archived = self._read_member(date)
+        if not path.exists():
+            return archived
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if archived:
+            data = {"entries": archived["entries"] + data["entries"],
+                    "daily_total": archived["daily_total"] + data["daily_total"]}
+        return data
+
+    def totals(self, date: str) -> Optional[Dict[str, Any]]:
+        """Archived day totals from the index (no decompression)"""
+        return self.index(date[:7]).get(date)
+
+    def _locked(self):
+        return file_lock(self.archive_dir / ".lock")
+
+    @traced("archive.compact")
+    def compact(self, keep_days: int = KEEP_DAYS, today: Optional[datetime] = None) -> Dict[str, int]:
+        """Move day files older than `keep_days` into their monthly archive.
+
+        The member is appended and fsynced before the index is rewritten and
+        the day file removed, so a crash at any point loses nothing (at worst
+        it leaves unreferenced bytes at the end of the archive).
+        """
+        cutoff = ((today or datetime.now()) - timedelta(days=keep_days)).strftime('%Y-%m-%d')
+        counts = {"days": 0, "bytes_before": 0, "bytes_after": 0}
+
+        candidates = sorted(p for p in self.storage_path.glob("????-??-??.json") if p.stem < cutoff)
+        if not candidates:
+            return counts
+
+        with self._locked():
+            for path in candidates:
+                if not path.exists():  # compacted by another process meanwhile
+                    continue
+                date, month = path.stem, path.stem[:7]
+                # Merges with an existing member if the day was written after archiving
+                data = self.read_day(date)
+
+                index = dict(self.index(month))
+                services: Dict[str, float] = {}
+                for e in data.get("entries", []):
+                    services[e["service"]] = services.get(e["service"], 0.0) + e.get("cost_usd", 0.0)
+                member = gzip.compress(json.dumps(data, separators=(",", ":")).encode(), compresslevel=9)
+
+                data_file = self._data_file(month)
+                with open(data_file, 'ab') as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(member)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                index[date] = {
+                    "offset": offset,
+                    "length": len(member),
+                    "entries": len(data.get("entries", [])),
+                    "daily_total": data.get("daily_total", 0.0),
+                    "services": services,
+                }
+                tmp = self._index_file(month).with_suffix(".tmp")
+                with open(tmp, 'w') as f:
+                    json.dump(dict(sorted(index.items())), f, indent=1)
+                os.replace(tmp, self._index_file(month))
+                self._indexes[month] = (self._index_file(month).stat().st_mtime_ns, index)
+                counts["bytes_after"] += len(member)
+                counts["bytes_before"] += path.stat().st_size
+                path.unlink()
+                counts["days"] += 1
+
+        return counts
+
+
+__all__ = [
+    'KEEP_DAYS',
+    'UsageArchive',
+    'file_lock'
+]
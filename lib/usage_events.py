@@ -0,0 +1,184 @@
+"""
+Usage Events
+Compact in-memory representation of usage events for analytics
+
+`UsageEvent` is a __slots__ record with interned service/operation strings.
+`EventColumns` stores many events as parallel typed arrays (struct of
+arrays) with services and operations dictionary-encoded to small ints, so
+a year of events costs a few dozen bytes each and can be handed to NumPy
+without copying.
+"""
+import sys
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
+import pathlib
+
+from usage_archive import UsageArchive
+
+NUMPY_MIN_EVENTS = 50_000  # below this the pure-Python totals beat NumPy's import time
+
+
+class UsageEvent:
+    __slots__ = ("timestamp", "service", "operation", "cost_usd", "metadata")
+
+    def __init__(self, timestamp: float, service: str, operation: str, cost_usd: float,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.timestamp = timestamp
+        self.service = sys.intern(service)
+        self.operation = sys.intern(operation)
+        self.cost_usd = cost_usd
+        self.metadata = metadata
+
+    @classmethod
+    def from_entry(cls, entry: Dict[str, Any], keep_metadata: bool = False) -> "UsageEvent":
+        return cls(datetime.fromisoformat(entry["timestamp"]).timestamp(), entry["service"],
+                   entry["operation"], entry.get("cost_usd", 0.0),
+                   entry.get("metadata") if keep_metadata else None)
+
+    def to_entry(self) -> Dict[str, Any]:
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+            "service": self.service,
+            "operation": self.operation,
+            "cost_usd": self.cost_usd,
+            "metadata": self.metadata or {},
+        }
+
+    def __repr__(self):
+        return f"UsageEvent({self.service!r}, {self.operation!r}, ${self.cost_usd})"
+
+
+class EventColumns:
+    """Struct-of-arrays event store.
+
+    Columns: timestamp (float64), cost (float64), service id (uint16) and
+    operation id (uint32, one id per distinct service/operation pair).
+    """
+
+    def __init__(self):
+        self.timestamp = array("d")
+        self.cost = array("d")
+        self.service_id = array("H")
+        self.operation_id = array("I")
+        self.services: List[str] = []
+        self.operations: List[Tuple[int, str]] = []  # (service id, operation name)
+        self._service_ids: Dict[str, int] = {}
+        self._operation_ids: Dict[Tuple[int, str], int] = {}
+
+    def __len__(self):
+        return len(self.cost)
+
+    def _service(self, name: str) -> int:
+        sid = self._service_ids.get(name)
+        if sid is None:
+            sid = self._service_ids[name] = len(self.services)
+            self.services.append(sys.intern(name))
+        return sid
+
+    def _operation(self, sid: int, name: str) -> int:
+        key = (sid, name)
+        oid = self._operation_ids.get(key)
+        if oid is None:
+            oid = self._operation_ids[key] = len(self.operations)
+            self.operations.append((sid, sys.intern(name)))
+        return oid
+
+    def append(self, timestamp: float, service: str, operation: str, cost: float):
+        sid = self._service(service)
+        self.timestamp.append(timestamp)
+        self.cost.append(cost)
+        self.service_id.append(sid)
+        self.operation_id.append(self._operation(sid, operation))
+
+    def extend_entries(self, entries: Iterable[Dict[str, Any]]):
+        """Append raw day-file entries, dropping their metadata"""
+        for e in entries:
+            self.append(datetime.fromisoformat(e["timestamp"]).timestamp(),
+                        e["service"], e["operation"], e.get("cost_usd", 0.0))
+
+    def events(self) -> Iterator[UsageEvent]:
+        for i in range(len(self)):
+            sid = self.service_id[i]
+            yield UsageEvent(self.timestamp[i], self.services[sid],
+                             self.operations[self.operation_id[i]][1], self.cost[i])
+
+    def nbytes(self) -> int:
+        """Bytes used by the column buffers"""
+        return sum(col.itemsize * len(col) for col in
+                   (self.timestamp, self.cost, self.service_id, self.operation_id))
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """Zero-copy NumPy views of the columns"""
+        import numpy as np
+        return {
+            "timestamp": np.frombuffer(self.timestamp, dtype=np.float64),
+            "cost": np.frombuffer(self.cost, dtype=np.float64),
+            "service_id": np.frombuffer(self.service_id, dtype=np.uint16),
+            "operation_id": np.frombuffer(self.operation_id, dtype=np.uint32),
+        }
+
+    def _totals(self, ids: array, size: int) -> Tuple[List[float], List[int]]:
+        """Per-id cost sums and counts, vectorized when NumPy is available.
+
+        Small column sets skip NumPy: importing it costs more than the loop.
+        """
+        if len(ids) >= NUMPY_MIN_EVENTS:
+            try:
+                import numpy as np
+            except ImportError:
+                pass
+            else:
+                idx = np.frombuffer(ids, dtype=np.uint16 if ids.typecode == "H" else np.uint32)
+                weights = np.frombuffer(self.cost, dtype=np.float64)
+                return (np.bincount(idx, weights=weights, minlength=size).tolist(),
+                        np.bincount(idx, minlength=size).tolist())
+
+        costs, counts = [0.0] * size, [0] * size
+        for i, c in zip(ids, self.cost):
+            costs[i] += c
+            counts[i] += 1
+        return costs, counts
+
+    def service_summary(self) -> Dict[str, Dict]:
+        """Aggregate by service and operation (same shape as get_service_summary)"""
+        svc_cost, svc_calls = self._totals(self.service_id, len(self.services))
+        op_cost, op_calls = self._totals(self.operation_id, len(self.operations))
+
+        summary = {}
+        for sid, name in enumerate(self.services):
+            if svc_calls[sid]:
+                summary[name] = {"total_cost": svc_cost[sid], "total_calls": svc_calls[sid], "operations": {}}
+        for oid, (sid, op) in enumerate(self.operations):
+            if op_calls[oid]:
+                summary[self.services[sid]]["operations"][op] = {"count": op_calls[oid], "cost": op_cost[oid]}
+        return summary
+
+
+def day_range(days: int, end: Optional[datetime] = None) -> List[str]:
+    """Dates (YYYY-MM-DD) of the last `days` days, newest first"""
+    end = end or datetime.now()
+    return [(end - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+
+
+def load_columns(source: Union[pathlib.Path, str, UsageArchive], dates: Iterable[str]) -> EventColumns:
+    """Load the given days into columns, one day in memory at a time.
+
+    `source` is a usage directory or a UsageArchive; archived days are
+    decompressed individually, so only the requested range is read.
+    """
+    archive = source if isinstance(source, UsageArchive) else UsageArchive(source)
+    columns = EventColumns()
+    for date in dates:
+        data = archive.read_day(date)
+        if data:
+            columns.extend_entries(data.get("entries", []))
+    return columns
+
+
+__all__ = [
+    'EventColumns',
+    'UsageEvent',
+    'day_range',
+    'load_columns'
+]
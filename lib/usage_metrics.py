@@ -0,0 +1,353 @@
+"""
+Usage Metrics
+Local HTTP endpoint serving spend metrics from in-memory aggregates
+
+`UsageMetrics` digests each day of the window once and keeps per-day
+aggregates in memory. Refreshing stats the window's day files (at most
+every `refresh_interval` seconds) and re-digests only days whose file or
+archive member changed, so polling never re-reads the usage directory.
+Rendered responses are cached per ETag and conditional requests
+(If-None-Match) are answered with 304 and no body.
+
+Endpoints:
+  /metrics       Prometheus text exposition
+  /metrics.json  The same aggregates as JSON (for the dashboard)
+  /healthz       Liveness
+
+Usage: python3 usage_metrics.py [--host 127.0.0.1] [--port 9464] [--days 30]
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+import pathlib
+
+from usage_archive import UsageArchive
+from usage_events import day_range
+
+DEFAULT_PORT = 9464
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000)
+RATE_WINDOWS = {"1h": 3600, "24h": 86400}
+
+
+def digest_day(data: Dict[str, Any], keep_events: bool = True) -> Dict[str, Any]:
+    """Per-service totals, latency histograms and (timestamp, service, cost) events for one day.
+
+    Events are only needed for the rate windows, so older days drop them.
+    """
+    services: Dict[str, Dict[str, Any]] = {}
+    events: List[Tuple[float, str, float]] = []
+    for entry in data.get("entries", []):
+        service, cost = entry["service"], entry.get("cost_usd", 0.0)
+        svc = services.get(service)
+        if svc is None:
+            svc = services[service] = {"calls": 0, "cost": 0.0, "operations": {},
+                                       "latency": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                                       "latency_sum": 0.0, "latency_count": 0}
+        svc["calls"] += 1
+        svc["cost"] += cost
+        op = svc["operations"].setdefault(entry["operation"], {"calls": 0, "cost": 0.0})
+        op["calls"] += 1
+        op["cost"] += cost
+
+        latency = (entry.get("metadata") or {}).get("latency_ms")
+        if isinstance(latency, (int, float)):
+            i = 0
+            while i < len(LATENCY_BUCKETS_MS) and latency > LATENCY_BUCKETS_MS[i]:
+                i += 1
+            svc["latency"][i] += 1
+            svc["latency_sum"] += latency
+            svc["latency_count"] += 1
+
+        if keep_events:
+            events.append((datetime.fromisoformat(entry["timestamp"]).timestamp(), service, cost))
+    return {"services": services, "events": events}
+
+
+class UsageMetrics:
+    def __init__(self, storage_path: pathlib.Path, days: int = 30, refresh_interval: float = 2.0):
+        self.storage_path = pathlib.Path(storage_path)
+        self.archive = UsageArchive(self.storage_path)
+        self.days = days
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._days: Dict[str, Tuple[Any, Dict[str, Any]]] = {}  # date -> (signature, digest)
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._rendered: Dict[str, Tuple[str, bytes]] = {}  # format -> (etag, body)
+
+    def _signature(self, date: str):
+        path = self.storage_path / f"{date}.json"
+        try:
+            stat = path.stat()
+            file_sig = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            file_sig = None
+        meta = self.archive.totals(date)
+        return file_sig, (meta["offset"], meta["length"]) if meta else None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-digest days that changed; returns True if anything did"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._checked < self.refresh_interval:
+                return False
+            self._checked = now
+
+            dates = day_range(self.days)
+            recent = dates[:2]  # today and yesterday cover every rate window
+            changed = False
+            for date in dates:
+                sig = self._signature(date)
+                cached = self._days.get(date)
+                if cached and cached[0] == sig:
+                    if date not in recent and cached[1]["events"]:
+                        cached[1]["events"] = []
+                    continue
+                data = self.archive.read_day(date) if sig != (None, None) else None
+                self._days[date] = (sig, digest_day(data or {}, keep_events=date in recent))
+                changed = True
+            for date in set(self._days) - set(dates):  # rolled out of the window
+                del self._days[date]
+                changed = True
+
+            if changed:
+                self.version += 1
+                self._rendered.clear()
+            return changed
+
+    # --- aggregates --------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregate the cached days into the JSON document"""
+        with self._lock:
+            days = dict(self._days)
+        today = datetime.now().strftime('%Y-%m-%d')
+        now = time.time()
+
+        services: Dict[str, Dict[str, Any]] = {}
+        for date, (_, digest) in days.items():
+            for name, day in digest["services"].items():
+                svc = services.get(name)
+                if svc is None:
+                    svc = services[name] = {
+                        "today": {"calls": 0, "cost": 0.0},
+                        "window": {"calls": 0, "cost": 0.0},
+                        "operations": {},
+                        "rates": {w: {"calls": 0, "cost": 0.0} for w in RATE_WINDOWS},
+                        "latency_ms": {"buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1), "sum": 0.0, "count": 0},
+                    }
+                svc["window"]["calls"] += day["calls"]
+                svc["window"]["cost"] += day["cost"]
+                if date == today:
+                    svc["today"]["calls"] += day["calls"]
+                    svc["today"]["cost"] += day["cost"]
+                for op, stats in day["operations"].items():
+                    agg = svc["operations"].setdefault(op, {"calls": 0, "cost": 0.0})
+                    agg["calls"] += stats["calls"]
+                    agg["cost"] += stats["cost"]
+                hist = svc["latency_ms"]
+                hist["buckets"] = [a + b for a, b in zip(hist["buckets"], day["latency"])]
+                hist["sum"] += day["latency_sum"]
+                hist["count"] += day["latency_count"]
+
+            for ts, name, cost in digest["events"]:
+                for window, seconds in RATE_WINDOWS.items():
+                    if now - ts <= seconds:
+                        rate = services[name]["rates"][window]
+                        rate["calls"] += 1
+                        rate["cost"] += cost
+
+        for svc in services.values():
+            for agg in (svc["today"], svc["window"], *svc["operations"].values()):
+                agg["cost"] = round(agg["cost"], 6)
+            for window, seconds in RATE_WINDOWS.items():
+                rate = svc["rates"][window]
+                hours = seconds / 3600
+                svc["rates"][window] = {"calls_per_hour": round(rate["calls"] / hours, 4),
+                                        "usd_per_hour": round(rate["cost"] / hours, 6)}
+            hist = svc["latency_ms"]
+            hist["p50"] = _quantile(hist["buckets"], hist["count"], 0.5)
+            hist["p95"] = _quantile(hist["buckets"], hist["count"], 0.95)
+
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "version": self.version,
+            "window_days": self.days,
+            "totals": {
+                "today": {"calls": sum(s["today"]["calls"] for s in services.values()),
+                          "cost": round(sum(s["today"]["cost"] for s in services.values()), 6)},
+                "window": {"calls": sum(s["window"]["calls"] for s in services.values()),
+                           "cost": round(sum(s["window"]["cost"] for s in services.values()), 6)},
+            },
+            "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+            "services": services,
+        }
+
+    def prometheus(self, snap: Dict[str, Any]) -> str:
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP second_brain_{name} {help_text}")
+            lines.append(f"# TYPE second_brain_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"second_brain_{name}{{{label_text}}} {value}")
+
+        services = snap["services"]
+        window = f"{snap['window_days']}d"
+        metric("spend_usd", "gauge", "API spend recorded by the usage tracker", [
+            ({"service": name, "window": w}, svc[key]["cost"])
+            for name, svc in services.items() for w, key in (("today", "today"), (window, "window"))])
+        metric("calls", "gauge", "API calls recorded by the usage tracker", [
+            ({"service": name, "window": w}, svc[key]["calls"])
+            for name, svc in services.items() for w, key in (("today", "today"), (window, "window"))])
+        metric("operation_calls", "gauge", f"Calls per operation over the last {window}", [
+            ({"service": name, "operation": op}, stats["calls"])
+            for name, svc in services.items() for op, stats in svc["operations"].items()])
+        metric("calls_per_hour", "gauge", "Call rate over a trailing window", [
+            ({"service": name, "window": w}, rate["calls_per_hour"])
+            for name, svc in services.items() for w, rate in svc["rates"].items()])
+        metric("spend_usd_per_hour", "gauge", "Spend rate over a trailing window", [
+            ({"service": name, "window": w}, rate["usd_per_hour"])
+            for name, svc in services.items() for w, rate in svc["rates"].items()])
+
+        lines.append("# HELP second_brain_request_latency_ms Provider call latency")
+        lines.append("# TYPE second_brain_request_latency_ms histogram")
+        for name, svc in services.items():
+            hist = svc["latency_ms"]
+            if not hist["count"]:
+                continue
+            label = _escape_label(name)
+            cumulative = 0
+            for le, count in zip([*LATENCY_BUCKETS_MS, "+Inf"], hist["buckets"]):
+                cumulative += count
+                lines.append(f'second_brain_request_latency_ms_bucket{{service="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'second_brain_request_latency_ms_sum{{service="{label}"}} {round(hist["sum"], 3)}')
+            lines.append(f'second_brain_request_latency_ms_count{{service="{label}"}} {hist["count"]}')
+
+        return "\n".join(lines) + "\n"
+
+    def render(self, fmt: str) -> Tuple[str, bytes]:
+        """(etag, body) for "json" or "prometheus", rendered once per change.
+
+        Rates slide with time, so the ETag also rolls over every minute.
+        """
+        self.refresh()
+        # The format is part of the tag so one format's ETag never validates the other
+        etag = f'"{fmt}-{self.version}-{int(time.time() // 60)}"'
+        cached = self._rendered.get(fmt)
+        if cached and cached[0] == etag:
+            return cached
+        snap = self.snapshot()
+        if fmt == "json":
+            body = json.dumps(snap, indent=2).encode()
+        else:
+            body = self.prometheus(snap).encode()
+        self._rendered[fmt] = (etag, body)
+        return etag, body
+
+
+def _quantile(buckets: List[int], count: int, q: float) -> Any:
+    """Upper bound of the bucket holding the q-quantile ("+Inf" past the last bucket)"""
+    if not count:
+        return None
+    target, seen = q * count, 0
+    for le, n in zip(LATENCY_BUCKETS_MS, buckets):
+        seen += n
+        if seen >= target:
+            return float(le)
+    return "+Inf"
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "prometheus": "text/plain; version=0.0.4; charset=utf-8",
+}
+ROUTES = {"/metrics": "prometheus", "/metrics.json": "json"}
+
+
+def make_handler(metrics: UsageMetrics):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/healthz":
+                return self._send(200, b"ok\n", "text/plain")
+            fmt = ROUTES.get(path)
+            if fmt is None:
+                return self._send(404, b"not found\n", "text/plain")
+
+            etag, body = metrics.render(fmt)
+            if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+                return self._send(304, b"", CONTENT_TYPES[fmt], etag)
+            self._send(200, body, CONTENT_TYPES[fmt], etag)
+
+        def _send(self, status: int, body: bytes, content_type: str, etag: Optional[str] = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            if etag:
+                self.send_header("ETag", etag)
+            if status != 304:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return MetricsHandler
+
+
+def serve(metrics: UsageMetrics, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Create the server (call serve_forever() on it) after an initial load"""
+    metrics.refresh(force=True)
+    return ThreadingHTTPServer((host, port), make_handler(metrics))
+
+
+def main(argv: Optional[List[str]] = None):
+    import sys
+    from usage_tracker import USAGE_DIR
+
+    args = list(sys.argv[1:] if argv is None else argv)
+    options = {"--host": "127.0.0.1", "--port": str(DEFAULT_PORT), "--days": "30"}
+    while args:
+        arg = args.pop(0)
+        if arg in options and args:
+            options[arg] = args.pop(0)
+        else:
+            print("Usage: python3 usage_metrics.py [--host 127.0.0.1] [--port 9464] [--days 30]")
+            sys.exit(1)
+
+    metrics = UsageMetrics(USAGE_DIR, days=int(options["--days"]))
+    server = serve(metrics, options["--host"], int(options["--port"]))
+    print(f"📊 Serving usage metrics on http://{options['--host']}:{options['--port']}/metrics(.json)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+__all__ = [
+    'LATENCY_BUCKETS_MS',
+    'UsageMetrics',
+    'digest_day',
+    'serve'
+]
+
+
+if __name__ == "__main__":
+    from tracing import session
+
+    with session("usage-metrics"):
+        main()
@@ -2,18 +2,196 @@
 API Usage Tracker
 Logs all API calls with costs and metadata
 """
+import atexit
 import json
+import math
 import os
+import queue
+import tempfile
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 import pathlib
 
+import providers
+from budget import BudgetExceeded, BudgetLedger, active_reservation
+from tracing import traced
+from usage_archive import UsageArchive, file_lock
+from usage_events import EventColumns, day_range, load_columns
+
+USAGE_DIR = os.environ.get("SECOND_BRAIN_USAGE_DIR", "/Users/adzoboateng/clawd/second-brain-docs/usage")
+
+class StreamStats:
+    """Constant-size running statistics for one (service, operation) stream"""
+    __slots__ = ("count", "cost_mean", "cost_var", "last_ts", "fast_gap", "slow_gap", "alerted")
+
+    def __init__(self, count=0, cost_mean=0.0, cost_var=0.0, last_ts=None,
+                 fast_gap=None, slow_gap=None, alerted=None):
+        self.count = count
+        self.cost_mean = cost_mean
+        self.cost_var = cost_var
+        self.last_ts = last_ts
+        self.fast_gap = fast_gap
+        self.slow_gap = slow_gap
+        self.alerted = alerted or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class AnomalyDetector:
+    """Flags cost and call-rate spikes as usage events arrive.
+
+    Cost: EWMA mean/variance per stream; an event is a spike when it sits
+    more than `z_threshold` deviations above the running mean.
+    Rate: a fast and a slow EWMA of the gap between calls; a burst shows up
+    as the fast gap collapsing relative to the slow one.
+    State is a few floats per stream and is persisted so short-lived
+    scripts build on each other's history. Saving merges under a file lock:
+    only the streams this process updated overwrite what is on disk.
+    """
+
+    def __init__(self, state_file: Optional[pathlib.Path] = None, alpha: float = 0.1,
+                 z_threshold: float = 4.0, min_cost: float = 0.05, warmup: int = 10,
+                 fast_alpha: float = 0.5, slow_alpha: float = 0.02, rate_ratio: float = 5.0,
+                 min_rate_per_min: float = 6.0, cooldown: float = 600.0):
+        self.state_file = pathlib.Path(state_file) if state_file else None
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_cost = min_cost
+        self.warmup = warmup
+        self.fast_alpha = fast_alpha
+        self.slow_alpha = slow_alpha
+        self.rate_ratio = rate_ratio
+        self.min_rate_per_min = min_rate_per_min
+        self.cooldown = cooldown
+        self.streams: Optional[Dict[str, StreamStats]] = None
+        self._dirty: set = set()
+
+    def _read(self) -> Dict[str, StreamStats]:
+        if self.state_file and self.state_file.exists():
+            try:
+                with open(self.state_file, 'r') as f:
+                    return {k: StreamStats(**v) for k, v in json.load(f).items()}
+            except (ValueError, TypeError):
+                pass
+        return {}
+
+    def _load(self):
+        self.streams = self._read()
+
+    def _save(self):
+        if not self.state_file:
+            return
+        with file_lock(self.state_file.with_suffix(".lock")):
+            # Other processes may have saved their streams since we loaded
+            merged = self._read()
+            merged.update({k: self.streams[k] for k in self._dirty})
+            fd, tmp = tempfile.mkstemp(dir=self.state_file.parent, prefix=".anomaly-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({k: s.to_dict() for k, s in merged.items()}, f)
+                os.replace(tmp, self.state_file)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+        self.streams = merged
+        self._dirty.clear()
+
+    def observe(self, service: str, operation: str, cost: float,
+                ts: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Update the stream's statistics and return any alerts it triggers"""
+        if self.streams is None:
+            self._load()
+        ts = time.time() if ts is None else ts
+        key = f"{service}|{operation}"
+        s = self.streams.get(key)
+        if s is None:
+            s = self.streams[key] = StreamStats()
+        alerts = []
+
+        if s.count >= self.warmup and cost >= self.min_cost:
+            # Floor the deviation so a perfectly flat history isn't hair-trigger
+            std = max(math.sqrt(s.cost_var), 0.1 * s.cost_mean, 1e-6)
+            z = (cost - s.cost_mean) / std
+            if z > self.z_threshold:
+                alerts.append({"kind": "cost_spike", "cost": cost,
+                               "expected": round(s.cost_mean, 6), "z": round(z, 1)})
+
+        if s.last_ts is not None:
+            gap = max(ts - s.last_ts, 1e-3)
+            s.fast_gap = gap if s.fast_gap is None else self.fast_alpha * gap + (1 - self.fast_alpha) * s.fast_gap
+            s.slow_gap = gap if s.slow_gap is None else self.slow_alpha * gap + (1 - self.slow_alpha) * s.slow_gap
+            rate = 60.0 / s.fast_gap
+            if (s.count >= self.warmup and rate >= self.min_rate_per_min
+                    and s.slow_gap / s.fast_gap >= self.rate_ratio):
+                alerts.append({"kind": "rate_spike", "calls_per_min": round(rate, 1),
+                               "baseline_per_min": round(60.0 / s.slow_gap, 2)})
+
+        # Update cost statistics after the check so a spike can't hide itself
+        diff = cost - s.cost_mean
+        incr = self.alpha * diff
+        s.cost_mean = cost if s.count == 0 else s.cost_mean + incr
+        s.cost_var = 0.0 if s.count == 0 else (1 - self.alpha) * (s.cost_var + diff * incr)
+        s.count += 1
+        s.last_ts = ts
+
+        fired = []
+        for alert in alerts:
+            if ts - s.alerted.get(alert["kind"], float("-inf")) >= self.cooldown:
+                s.alerted[alert["kind"]] = ts
+                alert.update(service=service, operation=operation,
+                             timestamp=datetime.fromtimestamp(ts).isoformat())
+                fired.append(alert)
+
+        self._dirty.add(key)
+        try:
+            self._save()
+        except OSError as e:
+            # Bookkeeping only: never fail the usage log over it
+            print(f"⚠️ Anomaly state not saved: {e}")
+        return fired
+
+
+def email_alert_hook(to: str, client=None) -> Callable[[Dict[str, Any]], None]:
+    """Build an alert hook that emails each alert through AgentMail"""
+    def hook(alert: Dict[str, Any]):
+        from mailer import DEFAULT_INBOX, get_client, send_one
+        subject = f"⚠️ Usage anomaly: {alert['kind']} on {alert['service']}"
+        send_one(client or get_client(), DEFAULT_INBOX, to,
+                 {"subject": subject, "text": json.dumps(alert, indent=2)}, retries=1)
+    return hook
+
+
+ALERT_FLUSH_TIMEOUT = 10.0  # seconds to wait at exit for queued alert hooks
+
+
 class UsageTracker:
-    def __init__(self, storage_path: str = "/Users/adzoboateng/clawd/second-brain-docs/usage"):
+    def __init__(self, storage_path: str = USAGE_DIR):
         self.storage_path = pathlib.Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
-        self.daily_file = self.storage_path / f"{datetime.now().strftime('%Y-%m-%d')}.json"
+        self.archive = UsageArchive(self.storage_path)
+        self.budget = BudgetLedger(self.storage_path)
+        self._lock = threading.Lock()
+        self.lock_file = self.storage_path / ".usage.lock"
+        self.anomalies = AnomalyDetector(self.storage_path / ".anomaly-state.json")
+        self.alerts_file = self.storage_path / "alerts.jsonl"
+        self.auto_compact = True
+        self.alert_hooks: List[Callable[[Dict[str, Any]], None]] = [self._record_alert]
+        if os.environ.get("USAGE_ALERT_EMAIL"):
+            self.alert_hooks.append(email_alert_hook(os.environ["USAGE_ALERT_EMAIL"]))
+        self._hook_queue: "queue.Queue" = queue.Queue()
+        self._hook_thread: Optional[threading.Thread] = None
+        self._hook_lock = threading.Lock()
         
+    @property
+    def daily_file(self) -> pathlib.Path:
+        # Resolved per call so long-running processes roll over at midnight
+        return self.storage_path / f"{datetime.now().strftime('%Y-%m-%d')}.json"
+    
+    @traced("usage.log_usage")
     def log_usage(self, service: str, operation: str, cost: float = 0.0, 
                   metadata: Optional[Dict[str, Any]] = None):
         """Log an API usage event"""
@@ -25,215 +203,184 @@ class UsageTracker:
             "metadata": metadata or {}
         }
         
-        # Load existing daily log
-        if self.daily_file.exists():
-            with open(self.daily_file, 'r') as f:
-                data = json.load(f)
-        else:
-            data = {"entries": [], "daily_total": 0.0}
+        # Update budget totals first: a period seeded from the day files
+        # right now must not already contain this entry
+        reservation = active_reservation.get()
+        if reservation is not None and reservation.service == service and not reservation.settled:
+            reservation.commit(cost)
+        elif cost:
+            self.budget.record(service, cost)
         
-        # Add entry
-        data["entries"].append(entry)
-        data["daily_total"] += cost
+        # The thread lock orders writers in this process, the file lock across processes
+        with self._lock, file_lock(self.lock_file):
+            daily_file = self.daily_file
+            
+            # Load existing daily log
+            if daily_file.exists():
+                with open(daily_file, 'r') as f:
+                    data = json.load(f)
+            else:
+                data = {"entries": [], "daily_total": 0.0}
+                # First event of a new day: archive days that are now closed
+                if self.auto_compact:
+                    try:
+                        self.archive.compact()
+                    except (OSError, ValueError) as e:
+                        print(f"⚠️ Usage compaction failed: {e}")
+            
+            # Add entry
+            data["entries"].append(entry)
+            data["daily_total"] += cost
+            
+            # Save (write-then-rename so readers never see a partial file)
+            fd, tmp = tempfile.mkstemp(dir=self.storage_path, prefix=".usage-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.chmod(tmp, 0o644)  # mkstemp creates 0600; keep day files readable as before
+                os.replace(tmp, daily_file)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            
+            alerts = self.anomalies.observe(service, operation, cost)
         
-        # Save
-        with open(self.daily_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        for alert in alerts:
+            for hook in self.alert_hooks:
+                if hook == self._record_alert:
+                    self._run_hook(hook, alert)
+                else:
+                    # Other hooks (e.g. email) may block; keep them off the paid call's path
+                    self._queue_hook(hook, alert)
         
         return entry
     
+    def add_alert_hook(self, hook: Callable[[Dict[str, Any]], None]):
+        """Call `hook(alert)` for every anomaly flagged while logging.
+
+        Hooks run on a background thread; pending ones are flushed at exit.
+        """
+        self.alert_hooks.append(hook)
+    
+    @staticmethod
+    def _run_hook(hook: Callable[[Dict[str, Any]], None], alert: Dict[str, Any]):
+        try:
+            hook(alert)
+        except Exception as e:
+            print(f"⚠️ Alert hook failed: {e}")
+    
+    def _queue_hook(self, hook: Callable[[Dict[str, Any]], None], alert: Dict[str, Any]):
+        with self._hook_lock:
+            if self._hook_thread is None:
+                self._hook_thread = threading.Thread(target=self._hook_worker, name="usage-alert-hooks",
+                                                     daemon=True)
+                self._hook_thread.start()
+                atexit.register(self.flush_alerts)
+        self._hook_queue.put((hook, alert))
+    
+    def _hook_worker(self):
+        while True:
+            item = self._hook_queue.get()
+            if item is None:
+                return
+            self._run_hook(*item)
+    
+    def flush_alerts(self, timeout: float = ALERT_FLUSH_TIMEOUT):
+        """Wait for queued alert hooks to finish"""
+        with self._hook_lock:
+            thread, self._hook_thread = self._hook_thread, None
+            if thread is None:
+                return
+            atexit.unregister(self.flush_alerts)
+            self._hook_queue.put(None)
+        thread.join(timeout)
+    
+    def _record_alert(self, alert: Dict[str, Any]):
+        with open(self.alerts_file, 'a') as f:
+            f.write(json.dumps(alert) + "\n")
+    
+    def check_budget(self, service: str, cost: float) -> bool:
+        """Check whether a call costing `cost` fits the configured budgets"""
+        return self.budget.check(service, cost)
+    
+    def budget_guard(self, service: str, estimate: float):
+        """Reserve budget around a paid call; raises BudgetExceeded if it won't fit"""
+        return self.budget.guard(service, estimate)
+    
     def get_daily_summary(self, date: Optional[str] = None) -> Dict:
         """Get usage summary for a specific date"""
         if date is None:
             date = datetime.now().strftime('%Y-%m-%d')
         
-        file_path = self.storage_path / f"{date}.json"
-        if not file_path.exists():
-            return {"entries": [], "daily_total": 0.0}
-        
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        # Falls back to the compressed archive for compacted days
+        return self.archive.read_day(date) or {"entries": [], "daily_total": 0.0}
+    
+    def load_columns(self, days: int = 30) -> EventColumns:
+        """Load the last N days of events into compact columns"""
+        return load_columns(self.archive, day_range(days))
     
+    @traced("usage.get_service_summary")
     def get_service_summary(self, days: int = 30) -> Dict[str, Dict]:
         """Get aggregated usage by service over N days"""
-        summary = {}
-        
-        for i in range(days):
-            date = (datetime.now() - __import__('datetime').timedelta(days=i)).strftime('%Y-%m-%d')
-            daily_data = self.get_daily_summary(date)
-            
-            for entry in daily_data.get("entries", []):
-                service = entry["service"]
-                if service not in summary:
-                    summary[service] = {
-                        "total_cost": 0.0,
-                        "total_calls": 0,
-                        "operations": {}
-                    }
-                
-                summary[service]["total_cost"] += entry["cost_usd"]
-                summary[service]["total_calls"] += 1
-                
-                op = entry["operation"]
-                if op not in summary[service]["operations"]:
-                    summary[service]["operations"][op] = {"count": 0, "cost": 0.0}
-                summary[service]["operations"][op]["count"] += 1
-                summary[service]["operations"][op]["cost"] += entry["cost_usd"]
-        
-        return summary
+        return self.load_columns(days).service_summary()
 
 # Global tracker instance
 tracker = UsageTracker()
 
-# Convenience functions for common APIs
+# Convenience functions for common APIs (pricing lives in providers.py)
 def log_openai_usage(operation: str, tokens: int, model: str = "gpt-4"):
     """Log OpenAI API usage"""
-    # Approximate costs (varies by model)
-    costs_per_1k = {
-        "gpt-4": 0.03,
-        "gpt-4-turbo": 0.01,
-        "gpt-3.5-turbo": 0.0015,
-        "dall-e-3": 0.04  # per image
-    }
-    cost = (tokens / 1000) * costs_per_1k.get(model, 0.01)
-    
-    return tracker.log_usage(
-        service="OpenAI",
-        operation=operation,
-        cost=cost,
-        metadata={"model": model, "tokens": tokens}
-    )
+    return providers.get("openai").log(tracker, model, operation, tokens=tokens)
 
 def log_fal_image(prompt: str, model: str = "flux-dev"):
     """Log fal.ai image generation"""
-    costs = {
-        "flux-dev": 0.003,
-        "flux-pro": 0.05,
-        "stable-diffusion-xl": 0.002
-    }
-    cost = costs.get(model, 0.003)
-    
-    return tracker.log_usage(
-        service="fal.ai (Images)",
-        operation="image_generation",
-        cost=cost,
-        metadata={"model": model, "prompt_length": len(prompt)}
-    )
+    return providers.get("fal-image").log(tracker, model, prompt_length=len(prompt))
 
 def log_fal_video(prompt: str, model: str = "runway-gen3"):
     """Log fal.ai video generation"""
-    costs = {
-        "runway-gen3": 0.50,
-        "luma": 0.30,
-        "kling": 0.40
-    }
-    cost = costs.get(model, 0.50)
-    
-    return tracker.log_usage(
-        service="fal.ai (Video)",
-        operation="video_generation",
-        cost=cost,
-        metadata={"model": model, "prompt_length": len(prompt)}
-    )
+    return providers.get("fal-video").log(tracker, model, prompt_length=len(prompt))
 
 def log_elevenlabs(characters: int):
     """Log ElevenLabs TTS usage"""
-    # ~$0.30 per 1000 characters
-    cost = (characters / 1000) * 0.30
-    
-    return tracker.log_usage(
-        service="ElevenLabs",
-        operation="text_to_speech",
-        cost=cost,
-        metadata={"characters": characters}
-    )
+    return providers.get("elevenlabs").log(tracker, characters=characters)
 
 def log_exa_search(query: str):
     """Log Exa MCP search"""
-    return tracker.log_usage(
-        service="Exa MCP",
-        operation="web_search",
-        cost=0.0,  # Free tier
-        metadata={"query": query[:100]}
-    )
+    return providers.get("exa").log(tracker, query=query[:100])
 
 def log_browser_use(cloud_mode: bool = False):
     """Log browser-use session"""
-    cost = 0.50 if cloud_mode else 0.0
-    
-    return tracker.log_usage(
-        service="Browser-Use",
-        operation="cloud_session" if cloud_mode else "local_session",
-        cost=cost,
-        metadata={"cloud_mode": cloud_mode}
-    )
+    return providers.get("browser-use").log(tracker, operation="cloud_session" if cloud_mode else "local_session",
+                                            cloud_mode=cloud_mode)
 
 def log_gemini_image(prompt: str, model: str = "gemini-2.5-flash-image"):
     """Log Gemini/Nano Banana image generation"""
-    costs = {
-        "gemini-2.5-flash-image": 0.0,  # Free during preview
-        "gemini-3-pro-image-preview": 0.0  # Free during preview
-    }
-    cost = costs.get(model, 0.0)
-    
-    return tracker.log_usage(
-        service="Gemini (Nano Banana)",
-        operation="image_generation",
-        cost=cost,
-        metadata={"model": model, "prompt_length": len(prompt)}
-    )
+    return providers.get("gemini-image").log(tracker, model, prompt_length=len(prompt))
 
 def log_heygen_video(duration: int, model: str = "talking_photo"):
     """Log HeyGen video generation"""
-    # HeyGen pricing varies, approximate $0.05 per second
-    cost = duration * 0.05
-    
-    return tracker.log_usage(
-        service="HeyGen",
-        operation="video_generation",
-        cost=cost,
-        metadata={"duration_seconds": duration, "model": model}
-    )
+    return providers.get("heygen").log(tracker, model, duration_seconds=duration)
 
 def log_runway_video(duration: int, model: str = "gen3"):
     """Log Runway video generation"""
-    # Runway Gen-3 is ~$0.50 per 5 seconds
-    cost = (duration / 5) * 0.50
-    
-    return tracker.log_usage(
-        service="Runway",
-        operation="video_generation",
-        cost=cost,
-        metadata={"duration_seconds": duration, "model": model}
-    )
+    return providers.get("runway").log(tracker, model, duration_seconds=duration)
 
 def log_suno_music(duration: int):
     """Log Suno music generation"""
-    # Suno pricing varies, approximate $0.10 per 30 seconds
-    cost = (duration / 30) * 0.10
-    
-    return tracker.log_usage(
-        service="Suno",
-        operation="music_generation",
-        cost=cost,
-        metadata={"duration_seconds": duration}
-    )
+    return providers.get("suno").log(tracker, duration_seconds=duration)
 
 def log_kimi_k25(tokens: int, operation: str = "chat_completion"):
     """Log Kimi K2.5 model usage (Moonshot AI)"""
-    # Kimi K2.5 pricing: ~$0.50 per 1M tokens (input + output avg)
-    cost = (tokens / 1000000) * 0.50
-    
-    return tracker.log_usage(
-        service="Kimi K2.5",
-        operation=operation,
-        cost=cost,
-        metadata={"model": "kimi-k2.5", "tokens": tokens}
-    )
+    return providers.get("kimi").log(tracker, operation=operation, tokens=tokens)
 
 # Export functions
 __all__ = [
     'tracker',
+    'BudgetExceeded',
+    'USAGE_DIR',
+    'AnomalyDetector',
+    'email_alert_hook',
     'log_openai_usage',
     'log_fal_image',
     'log_fal_video', 
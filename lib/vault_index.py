@@ -0,0 +1,197 @@
+"""
+Vault Index
+Incremental full-text search over the second brain markdown (SQLite FTS5)
+"""
+import hashlib
+import re
+import sqlite3
+import time
+from typing import Dict, Any, Iterable, List, Optional
+import pathlib
+
+CLAWD_ROOT = pathlib.Path("/Users/adzoboateng/clawd")
+VAULT_ROOTS = [
+    CLAWD_ROOT / "second-brain-docs",
+    CLAWD_ROOT / "projects" / "second-brain" / "my-app" / "documents",
+]
+INDEX_FILE = CLAWD_ROOT / "second-brain-docs" / ".vault-index.db"
+
+TITLE_RE = re.compile(r'^title:\s*"?(.+?)"?\s*$|^#\s+(.+?)\s*$', re.MULTILINE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    title, body, tokenize = 'porter unicode61'
+);
+"""
+
+
+def extract_title(path: pathlib.Path, text: str) -> str:
+    match = TITLE_RE.search(text)
+    if match:
+        return match.group(1) or match.group(2)
+    return path.stem
+
+
+def to_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query that ANDs every word.
+
+    Words are quoted so punctuation in user input can't be parsed as FTS5
+    syntax; a trailing `*` on a word is kept as a prefix search.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class VaultIndex:
+    def __init__(self, index_file: pathlib.Path = INDEX_FILE,
+                 roots: Optional[Iterable[pathlib.Path]] = None):
+        self.index_file = pathlib.Path(index_file)
+        self.roots = [pathlib.Path(r) for r in (roots or VAULT_ROOTS)]
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.index_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _files(self):
+        for root in self.roots:
+            if root.exists():
+                yield from root.rglob("*.md")
+
+    def update(self) -> Dict[str, int]:
+        """Bring the index in line with the vault.
+
+        Files whose mtime and size are unchanged are skipped without being
+        read; files that were touched but not edited are caught by hash.
+
+        Returns:
+            Counts of added, updated, removed and unchanged files
+        """
+        start = time.perf_counter()
+        known = {row["path"]: row for row in self.conn.execute("SELECT * FROM docs")}
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+
+        with self.conn:
+            for path in self._files():
+                key = str(path)
+                seen.add(key)
+                stat = path.stat()
+                row = known.get(key)
+                if row and row["mtime_ns"] == stat.st_mtime_ns and row["size"] == stat.st_size:
+                    counts["unchanged"] += 1
+                    continue
+
+                raw = path.read_bytes()
+                sha = hashlib.sha256(raw).hexdigest()
+                if row and row["sha256"] == sha:
+                    self.conn.execute("UPDATE docs SET mtime_ns = ?, size = ? WHERE id = ?",
+                                      (stat.st_mtime_ns, stat.st_size, row["id"]))
+                    counts["unchanged"] += 1
+                    continue
+
+                text = raw.decode("utf-8", errors="replace")
+                title = extract_title(path, text)
+                if row:
+                    self.conn.execute("UPDATE docs SET mtime_ns = ?, size = ?, sha256 = ? WHERE id = ?",
+                                      (stat.st_mtime_ns, stat.st_size, sha, row["id"]))
+                    self.conn.execute("UPDATE docs_fts SET title = ?, body = ? WHERE rowid = ?",
+                                      (title, text, row["id"]))
+                    counts["updated"] += 1
+                else:
+                    cur = self.conn.execute("INSERT INTO docs (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+                                            (key, stat.st_mtime_ns, stat.st_size, sha))
+                    self.conn.execute("INSERT INTO docs_fts (rowid, title, body) VALUES (?, ?, ?)",
+                                      (cur.lastrowid, title, text))
+                    counts["added"] += 1
+
+            removed = [known[key]["id"] for key in set(known) - seen]
+            self.conn.executemany("DELETE FROM docs WHERE id = ?", [(i,) for i in removed])
+            self.conn.executemany("DELETE FROM docs_fts WHERE rowid = ?", [(i,) for i in removed])
+            counts["removed"] = len(removed)
+
+        counts["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return counts
+
+    def search(self, query: str, limit: int = 10, raw: bool = False) -> List[Dict[str, Any]]:
+        """Return the best matches for a query, ranked by BM25 (title weighted 5x).
+
+        Args:
+            query: Free text; every word must match. Pass raw=True to use
+                FTS5 syntax (OR, NEAR, "phrases") directly.
+            limit: Maximum number of results
+        """
+        match = query if raw else to_match_query(query)
+        if not match:
+            return []
+        rows = self.conn.execute(
+            """
+            SELECT docs.path, docs_fts.title,
+                   snippet(docs_fts, 1, '**', '**', '…', 16) AS snippet,
+                   bm25(docs_fts, 5.0, 1.0) AS score
+            FROM docs_fts JOIN docs ON docs.id = docs_fts.rowid
+            WHERE docs_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+        return [{"path": r["path"], "title": r["title"], "snippet": r["snippet"],
+                 "score": round(-r["score"], 3)} for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        count = self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        return {"documents": count, "index_bytes": self.index_file.stat().st_size}
+
+
+def main():
+    import json
+    import sys
+
+    args = sys.argv[1:]
+    index = VaultIndex()
+    if not args or args[0] == "update":
+        print(json.dumps(index.update(), indent=2))
+    elif args[0] == "search":
+        index.update()
+        start = time.perf_counter()
+        results = index.search(" ".join(args[1:]))
+        for r in results:
+            print(f"{r['score']:>7}  {r['title']}\n         {r['path']}\n         {r['snippet']}\n")
+        print(f"{len(results)} result(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    elif args[0] == "stats":
+        print(json.dumps(index.stats(), indent=2))
+    else:
+        print("Usage: python3 vault_index.py [update | search <query> | stats]")
+        sys.exit(1)
+
+
+__all__ = [
+    'VaultIndex',
+    'extract_title',
+    'to_match_query'
+]
+
+
+if __name__ == "__main__":
+    from tracing import session
+
+    with session("vault-index"):
+        main()
+
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Send a templated email to a list of recipients via AgentMail.
+
+Templates live in templates/ (e.g. daily-summary) and use $variables.
+Recipients come from a JSON list or CSV with an `email` column; any other
+fields are template variables. --data supplies variables shared by all.
+
+Usage: bulk_mail.py <template> <recipients.json|csv> [--data data.json]
+                    [--workers N] [--rate PER_SEC] [--retries N] [--dry-run]
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from mailer import FakeAgentMail, MailTemplate, load_recipients, send_bulk
+from tracing import session
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 2:
+        print(__doc__.strip().split("Usage: ")[1])
+        sys.exit(1)
+
+    template = MailTemplate.load(args.pop(0))
+    recipients = load_recipients(args.pop(0))
+
+    shared = {}
+    options = {}
+    client = None
+    while args:
+        arg = args.pop(0)
+        if arg == "--data":
+            with open(args.pop(0), 'r') as f:
+                shared = json.load(f)
+        elif arg == "--workers":
+            options["max_workers"] = int(args.pop(0))
+        elif arg == "--rate":
+            options["rate"] = float(args.pop(0))
+        elif arg == "--retries":
+            options["retries"] = int(args.pop(0))
+        elif arg == "--dry-run":
+            client = FakeAgentMail()
+            options["log_path"] = None
+
+    results = send_bulk(template, recipients, client=client, shared=shared, **options)
+    sent = sum(1 for r in results if r["success"])
+
+    print(json.dumps({
+        "sent": sent,
+        "failed": len(results) - sent,
+        "errors": {r["to"] or f"recipient {i + 1}": r["error"]
+                   for i, r in enumerate(results) if not r["success"]},
+    }, indent=2))
+
+    if isinstance(client, FakeAgentMail) and client.sent:
+        print("\n--- First rendered message ---")
+        print(f"Subject: {client.sent[0]['subject']}\n")
+        print(client.sent[0]["text"])
+
+    sys.exit(0 if sent == len(results) else 1)
+
+
+if __name__ == "__main__":
+    with session("bulk-mail"):
+        main()
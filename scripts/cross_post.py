@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Cross-post the same content to every configured platform at once.
+
+Fans out to Twitter (twitter_post.py) and Moltbook (moltbook_post.py)
+concurrently, so total latency is the slowest platform rather than the sum.
+
+Pass --queue to hand the posts to the durable outbox (outbox.py) instead of
+posting inline.
+
+Usage: cross_post.py <text> [--title TITLE] [--submolt NAME] [--platforms twitter,moltbook] [--queue [--key KEY]]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from tracing import session, span
+
+STATE_DIR = Path('/Users/adzoboateng/clawd')
+
+STATE_FILES = {
+    "twitter": STATE_DIR / "twitter-state.json",
+    "moltbook": STATE_DIR / "moltbook-state.json",
+}
+
+
+def _post_twitter(text: str, timeout: float = None, **_) -> dict:
+    from twitter_post import REQUEST_TIMEOUT, post_tweet
+
+    if len(text) > 280:
+        return {"success": False, "error": f"Tweet too long ({len(text)} chars, max 280)"}
+    return post_tweet(text, timeout=timeout or REQUEST_TIMEOUT)
+
+
+def _post_moltbook(text: str, title: str = None, submolt: str = "general", timeout: float = None, **_) -> dict:
+    from moltbook_post import REQUEST_TIMEOUT, post_to_moltbook
+
+    return post_to_moltbook(submolt, title or text.split("\n", 1)[0][:100], text,
+                            timeout=timeout or REQUEST_TIMEOUT)
+
+
+def _twitter_credentials() -> str:
+    from twitter_post import CREDENTIALS_FILE
+    return CREDENTIALS_FILE
+
+
+def _moltbook_credentials() -> str:
+    from moltbook_post import CREDENTIALS_FILE
+    return CREDENTIALS_FILE
+
+
+# platform -> (poster, credentials path getter)
+PLATFORMS = {
+    "twitter": (_post_twitter, _twitter_credentials),
+    "moltbook": (_post_moltbook, _moltbook_credentials),
+}
+
+
+def configured_platforms() -> list:
+    """Return the platforms whose credentials file is present."""
+    configured = []
+    for name, (_, credentials) in PLATFORMS.items():
+        try:
+            if os.path.exists(credentials()):
+                configured.append(name)
+        except ImportError:
+            continue
+    return configured
+
+
+def record_post(platform: str, result: dict):
+    """Record a successful post in the platform's state file."""
+    state_file = STATE_FILES[platform]
+    state = json.loads(state_file.read_text()) if state_file.exists() else {}
+
+    today = time.strftime("%Y-%m-%d")
+    if state.get("todayDate") != today:
+        state["todayDate"] = today
+        state["todayOriginalCount"] = 0
+        state["todayReplyCount"] = 0
+        state["todayTotalCount"] = 0
+
+    state["lastPostTimestamp"] = int(time.time())
+    state["lastPostType"] = "original"
+    if result.get("url"):
+        state["lastPostUrl"] = result["url"]
+    state["todayOriginalCount"] = state.get("todayOriginalCount", 0) + 1
+    state["todayTotalCount"] = state.get("todayTotalCount", 0) + 1
+    state["monthlyTotal"] = state.get("monthlyTotal", 0) + 1
+
+    # Write-then-rename so a crash never leaves a truncated state file
+    tmp = state_file.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(state, indent=2))
+    os.replace(tmp, state_file)
+
+
+async def _post_one(platform: str, text: str, **kwargs) -> dict:
+    poster, _ = PLATFORMS[platform]
+    start = time.perf_counter()
+    try:
+        with span(f"post.{platform}"):
+            result = await asyncio.to_thread(poster, text, **kwargs)
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    if result.get("success"):
+        try:
+            with span("post.record_state", platform=platform):
+                record_post(platform, result)
+        except OSError as e:
+            result["state_error"] = str(e)
+    return result
+
+
+async def cross_post(text: str, platforms: list = None, **kwargs) -> dict:
+    """Post text to every platform concurrently.
+
+    Args:
+        text: Post body (also the tweet text)
+        platforms: Platform names, defaults to every configured platform
+        **kwargs: Platform-specific options (title, submolt)
+
+    Returns:
+        Report dict with per-platform results and latencies
+    """
+    if platforms is None:
+        platforms = configured_platforms()
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(_post_one(p, text, **kwargs) for p in platforms))
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "success": bool(results) and all(r.get("success") for r in results),
+        "total_latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "results": dict(zip(platforms, results)),
+    }
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+
+    options = {}
+    platforms = None
+    text = None
+    queue = False
+    key = None
+    while args:
+        arg = args.pop(0)
+        if arg == "--title":
+            options["title"] = args.pop(0)
+        elif arg == "--submolt":
+            options["submolt"] = args.pop(0)
+        elif arg == "--platforms":
+            platforms = [p.strip() for p in args.pop(0).split(",") if p.strip()]
+        elif arg == "--queue":
+            queue = True
+        elif arg == "--key":
+            key = args.pop(0)
+        else:
+            text = arg
+
+    if not text:
+        print("Error: no post text provided")
+        sys.exit(1)
+
+    unknown = [p for p in platforms or [] if p not in PLATFORMS]
+    if unknown:
+        print(f"Error: unknown platform(s): {', '.join(unknown)}")
+        sys.exit(1)
+
+    if queue:
+        import outbox
+
+        conn = outbox.connect()
+        queued = {p: outbox.enqueue(conn, p, {"text": text, **options}, key)
+                  for p in platforms or configured_platforms()}
+        print(json.dumps(queued, indent=2))
+        sys.exit(0 if all(q["queued"] for q in queued.values()) else 1)
+
+    report = asyncio.run(cross_post(text, platforms, **options))
+    print(json.dumps(report, indent=2))
+
+    sys.exit(0 if report["success"] else 1)
+
+
+if __name__ == "__main__":
+    with session("cross-post"):
+        main()
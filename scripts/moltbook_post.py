@@ -3,14 +3,23 @@
 
 import json
 import sys
+from pathlib import Path
 import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from tracing import session
+
+CREDENTIALS_FILE = '/Users/adzoboateng/.config/moltbook/credentials.json'
+REQUEST_TIMEOUT = 30  # seconds
+
 def load_credentials():
     """Load Moltbook credentials from config."""
-    with open('/Users/adzoboateng/.config/moltbook/credentials.json', 'r') as f:
+    with open(CREDENTIALS_FILE, 'r') as f:
         return json.load(f)
 
-def post_to_moltbook(submolt: str, title: str, content: str = None, url: str = None) -> dict:
+def post_to_moltbook(submolt: str, title: str, content: str = None, url: str = None,
+                     timeout: float = REQUEST_TIMEOUT) -> dict:
     """Post to Moltbook.
     
     Args:
@@ -18,6 +27,7 @@ def post_to_moltbook(submolt: str, title: str, content: str = None, url: str = N
         title: Post title
         content: Post content (for text posts)
         url: URL (for link posts)
+        timeout: Seconds to wait for the API before giving up
         
     Returns:
         API response dict
@@ -42,7 +52,7 @@ def post_to_moltbook(submolt: str, title: str, content: str = None, url: str = N
     if url:
         payload["url"] = url
     
-    response = requests.post(endpoint, headers=headers, json=payload)
+    response = requests.post(endpoint, headers=headers, json=payload, timeout=timeout)
     
     if response.status_code in [200, 201]:
         data = response.json()
@@ -58,15 +68,16 @@ def post_to_moltbook(submolt: str, title: str, content: str = None, url: str = N
         }
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: moltbook_post.py <submolt> <title> [content]")
-        sys.exit(1)
+    with session("moltbook-post"):
+        if len(sys.argv) < 3:
+            print("Usage: moltbook_post.py <submolt> <title> [content]")
+            sys.exit(1)
     
-    submolt = sys.argv[1]
-    title = sys.argv[2]
-    content = sys.argv[3] if len(sys.argv) > 3 else None
+        submolt = sys.argv[1]
+        title = sys.argv[2]
+        content = sys.argv[3] if len(sys.argv) > 3 else None
     
-    result = post_to_moltbook(submolt, title, content)
-    print(json.dumps(result, indent=2))
+        result = post_to_moltbook(submolt, title, content)
+        print(json.dumps(result, indent=2))
     
-    sys.exit(0 if result['success'] else 1)
+        sys.exit(0 if result['success'] else 1)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Generate the nightly summary from usage and journal changes since the last run.
+
+Prints the rendered email by default; --send mails it with the
+daily-summary template. The manifest only advances once the summary has
+been printed or sent, so a failed send is regenerated next run.
+
+Usage: nightly_summary.py [--send EMAIL] [--name NAME] [--dry-run]
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from daily_summary import SummaryGenerator, render_content
+from mailer import DEFAULT_INBOX, DELIVERY_LOG, FakeAgentMail, MailTemplate, send_bulk
+from tracing import session
+
+
+def main():
+    args = sys.argv[1:]
+    to = None
+    name = "Aki"
+    dry_run = False
+    while args:
+        arg = args.pop(0)
+        if arg == "--send":
+            to = args.pop(0)
+        elif arg == "--name":
+            name = args.pop(0)
+        elif arg == "--dry-run":
+            dry_run = True
+        else:
+            print(__doc__.strip().splitlines()[-1])
+            sys.exit(1)
+
+    generator = SummaryGenerator()
+    report = generator.generate()
+    data = {
+        "title": datetime.now().strftime("%B %d, %Y"),
+        "inbox": DEFAULT_INBOX,
+        "content": render_content(report),
+        "name": name,
+    }
+    template = MailTemplate.load("daily-summary")
+
+    if to is None:
+        message = template.render(data)
+        print(f"Subject: {message['subject']}\n")
+        print(message["text"])
+    else:
+        client = FakeAgentMail() if dry_run else None
+        result = send_bulk(template, [{"email": to}], client=client, shared=data,
+                           log_path=None if dry_run else DELIVERY_LOG)[0]
+        if not result["success"]:
+            print(f"❌ Error: {result['error']}")
+            sys.exit(1)
+        print(f"✅ Summary sent to {to}")
+
+    if not dry_run:
+        generator.save_manifest()
+
+
+if __name__ == "__main__":
+    with session("nightly-summary"):
+        main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Durable outbox for Twitter and Moltbook posts.
+
+Posts are enqueued into a local SQLite database and drained by a worker
+with retries, so nothing is lost when an API is down. Each item carries an
+idempotency key (platform, content and the day it was queued, or a key
+the caller supplies); enqueuing the same post twice reports a duplicate
+instead of queuing it again, and items that
+exhaust their retries (or are rejected with a client error) are kept with
+their last error.
+
+Usage:
+  outbox.py enqueue <platform> <text> [--title TITLE] [--submolt NAME] [--key KEY]
+  outbox.py drain [--loop SECONDS]
+  outbox.py status
+  outbox.py failed
+  outbox.py retry <id|all>
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cross_post import PLATFORMS, STATE_DIR, record_post
+from tracing import session, traced
+
+OUTBOX_DB = STATE_DIR / "outbox.db"
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30  # seconds, doubled after every failed attempt
+BACKOFF_MAX = 3600
+DEDUP_WINDOW = 86400  # seconds; the same post can be queued again in the next window
+LEASE_SECONDS = 300  # "sending" items older than this are assumed crashed
+SEND_TIMEOUT = 60  # per-request API timeout, well inside the lease so a hung send can't be re-claimed
+
+# 4xx responses won't succeed on retry, except timeouts and rate limits
+RETRYABLE_STATUS = {408, 429}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    platform TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    leased_at REAL,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+def connect(db_path=OUTBOX_DB) -> sqlite3.Connection:
+    """Open the outbox database, creating it if needed."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def idempotency_key(platform: str, payload: dict, scope: str = None) -> str:
+    """Derive a stable key for a post from its platform, content and scope.
+
+    The scope defaults to the current DEDUP_WINDOW, so a retried enqueue
+    is deduplicated but the same text can be posted again later.
+    """
+    scope = scope or str(int(time.time() // DEDUP_WINDOW))
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{platform}\n{scope}\n{canonical}".encode()).hexdigest()
+
+
+def enqueue(conn, platform: str, payload: dict, key: str = None) -> dict:
+    """Add a post to the outbox.
+
+    Args:
+        platform: Platform name (see cross_post.PLATFORMS)
+        payload: Poster arguments, at least {"text": ...}
+        key: Caller-supplied idempotency scope (e.g. a draft id); defaults
+            to the current dedup window
+
+    Returns:
+        Dict with the item id and whether it was newly queued; a duplicate
+        also carries an `error`
+    """
+    if platform not in PLATFORMS:
+        raise ValueError(f"Unknown platform: {platform}")
+
+    key = idempotency_key(platform, payload, key)
+    now = time.time()
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO outbox (idempotency_key, platform, payload, next_attempt_at, created_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (key, platform, json.dumps(payload), now, now),
+    )
+    row = conn.execute("SELECT id, status FROM outbox WHERE idempotency_key = ?", (key,)).fetchone()
+    result = {"id": row["id"], "key": key, "queued": cur.rowcount == 1, "status": row["status"]}
+    if not result["queued"]:
+        result["error"] = f"duplicate of outbox item {row['id']} ({row['status']})"
+    return result
+
+
+def _claim(conn, limit: int) -> list:
+    """Lease due items so concurrent workers never send the same one."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            "SELECT * FROM outbox WHERE (status = 'pending' AND next_attempt_at <= ?) "
+            "OR (status = 'sending' AND leased_at <= ?) ORDER BY id LIMIT ?",
+            (now, now - LEASE_SECONDS, limit),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE outbox SET status = 'sending', leased_at = ? WHERE id = ?",
+            [(now, row["id"]) for row in rows],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return rows
+
+
+@traced("outbox.send")
+def _send(row) -> dict:
+    poster, _ = PLATFORMS[row["platform"]]
+    payload = json.loads(row["payload"])
+    try:
+        return poster(payload.pop("text"), timeout=SEND_TIMEOUT, **payload)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def _permanent(result: dict) -> bool:
+    code = result.get("status_code")
+    return isinstance(code, int) and 400 <= code < 500 and code not in RETRYABLE_STATUS
+
+
+def _finish(conn, row, result: dict) -> str:
+    """Record a send attempt; returns the item's new status."""
+    now = time.time()
+    attempts = row["attempts"] + 1
+
+    if result.get("success"):
+        conn.execute(
+            "UPDATE outbox SET status = 'sent', attempts = ?, sent_at = ?, result = ?, "
+            "last_error = NULL, leased_at = NULL WHERE id = ?",
+            (attempts, now, json.dumps(result), row["id"]),
+        )
+        try:
+            record_post(row["platform"], result)
+        except OSError:
+            pass
+        return "sent"
+
+    error = result.get("error") or json.dumps(result)
+    if attempts >= MAX_ATTEMPTS or _permanent(result):
+        status, next_attempt = "failed", now
+    else:
+        status = "pending"
+        next_attempt = now + min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    conn.execute(
+        "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, "
+        "leased_at = NULL WHERE id = ?",
+        (status, attempts, next_attempt, error, row["id"]),
+    )
+    return status
+
+
+def drain(conn, batch_size: int = 20, max_workers: int = 4) -> dict:
+    """Send every due item once.
+
+    Items are posted concurrently, so one slow platform doesn't hold up
+    the others. Only as many items as there are workers are leased per
+    round, so every leased item starts sending straight away and finishes
+    well inside LEASE_SECONDS.
+
+    Returns:
+        Counts of sent, retried and failed items
+    """
+    counts = {"sent": 0, "retry": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            rows = _claim(conn, min(batch_size, max_workers))
+            if not rows:
+                break
+            for row, result in zip(rows, pool.map(_send, rows)):
+                status = _finish(conn, row, result)
+                counts["retry" if status == "pending" else status] += 1
+    return counts
+
+
+def status(conn) -> dict:
+    """Count items per status."""
+    rows = conn.execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status").fetchall()
+    return {row["status"]: row["n"] for row in rows}
+
+
+def failed(conn) -> list:
+    """List items that exhausted their retries."""
+    rows = conn.execute(
+        "SELECT id, platform, payload, attempts, last_error FROM outbox WHERE status = 'failed' ORDER BY id"
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def retry(conn, item_id=None) -> int:
+    """Requeue failed items (all of them when item_id is None)."""
+    query = "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'failed'"
+    params = [time.time()]
+    if item_id is not None:
+        query += " AND id = ?"
+        params.append(item_id)
+    return conn.execute(query, params).rowcount
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__.strip().split("Usage:")[1].rstrip())
+        sys.exit(1)
+
+    conn = connect()
+    command = args.pop(0)
+
+    if command == "enqueue":
+        if len(args) < 2:
+            print("Usage: outbox.py enqueue <platform> <text> [--title TITLE] [--submolt NAME] [--key KEY]")
+            sys.exit(1)
+        platform, payload, key = args.pop(0), {"text": args.pop(0)}, None
+        while args:
+            flag = args.pop(0)
+            if flag in ("--title", "--submolt"):
+                payload[flag[2:]] = args.pop(0)
+            elif flag == "--key":
+                key = args.pop(0)
+        result = enqueue(conn, platform, payload, key)
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result["queued"] else 1)
+
+    elif command == "drain":
+        interval = float(args[1]) if len(args) > 1 and args[0] == "--loop" else None
+        while True:
+            counts = drain(conn)
+            print(json.dumps(counts))
+            if interval is None:
+                break
+            time.sleep(interval)
+
+    elif command == "status":
+        print(json.dumps(status(conn), indent=2))
+
+    elif command == "failed":
+        print(json.dumps(failed(conn), indent=2))
+
+    elif command == "retry":
+        target = args[0] if args else "all"
+        count = retry(conn, None if target == "all" else int(target))
+        print(f"Requeued {count} item(s)")
+
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    with session("outbox"):
+        main()
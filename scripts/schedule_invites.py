@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Send a batch of calendar invites concurrently.
+
+The events file is a JSON list of objects such as:
+  {"summary": "Onboarding call", "start": "2026-03-02T10:00", "tzid": "America/New_York",
+   "duration_minutes": 30, "attendees": ["user@example.com"], "rrule": "FREQ=WEEKLY;COUNT=4"}
+
+Usage: schedule_invites.py <events.json> [--workers N] [--rate PER_SEC] [--dry-run] [--ics-only]
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from ical import calendar, event_from_dict, schedule_batch
+from mailer import FakeAgentMail
+from tracing import session
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+
+    with open(args.pop(0), 'r') as f:
+        events = [event_from_dict(e) for e in json.load(f)]
+
+    options = {}
+    client = None
+    while args:
+        arg = args.pop(0)
+        if arg == "--workers":
+            options["max_workers"] = int(args.pop(0))
+        elif arg == "--rate":
+            options["rate"] = float(args.pop(0))
+        elif arg == "--dry-run":
+            client = FakeAgentMail()
+        elif arg == "--ics-only":
+            sys.stdout.write(calendar(events))
+            sys.exit(0)
+
+    results = schedule_batch(events, client=client, **options)
+    print(json.dumps(results, indent=2))
+
+    sys.exit(0 if all(r["success"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    with session("schedule-invites"):
+        main()
@@ -3,18 +3,27 @@
 
 import json
 import sys
+from pathlib import Path
 from requests_oauthlib import OAuth1Session
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from tracing import session
+
+CREDENTIALS_FILE = '/Users/adzoboateng/.config/twitter/credentials.json'
+REQUEST_TIMEOUT = 30  # seconds
+
 def load_credentials():
     """Load Twitter credentials from config."""
-    with open('/Users/adzoboateng/.config/twitter/credentials.json', 'r') as f:
+    with open(CREDENTIALS_FILE, 'r') as f:
         return json.load(f)
 
-def post_tweet(text: str) -> dict:
+def post_tweet(text: str, timeout: float = REQUEST_TIMEOUT) -> dict:
     """Post a tweet using Twitter API v2.
     
     Args:
         text: Tweet text (max 280 chars)
+        timeout: Seconds to wait for the API before giving up
         
     Returns:
         API response dict
@@ -34,7 +43,7 @@ def post_tweet(text: str) -> dict:
     
     payload = {"text": text}
     
-    response = oauth.post(url, json=payload)
+    response = oauth.post(url, json=payload, timeout=timeout)
     
     if response.status_code == 201:
         data = response.json()
@@ -53,17 +62,18 @@ def post_tweet(text: str) -> dict:
         }
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: twitter_post.py <tweet_text>")
-        sys.exit(1)
+    with session("twitter-post"):
+        if len(sys.argv) < 2:
+            print("Usage: twitter_post.py <tweet_text>")
+            sys.exit(1)
     
-    tweet_text = sys.argv[1]
+        tweet_text = sys.argv[1]
     
-    if len(tweet_text) > 280:
-        print(f"Error: Tweet too long ({len(tweet_text)} chars, max 280)")
-        sys.exit(1)
+        if len(tweet_text) > 280:
+            print(f"Error: Tweet too long ({len(tweet_text)} chars, max 280)")
+            sys.exit(1)
     
-    result = post_tweet(tweet_text)
-    print(json.dumps(result, indent=2))
+        result = post_tweet(tweet_text)
+        print(json.dumps(result, indent=2))
     
-    sys.exit(0 if result['success'] else 1)
+        sys.exit(0 if result['success'] else 1)
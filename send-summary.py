@@ -1,18 +1,24 @@
 #!/usr/bin/env python3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "lib"))
+
 from agentmail import AgentMail
+from mailer import MailTemplate, send_bulk
+from tracing import session
 
 # Initialize the client
 api_key = "am_f85356eab47ebae5877d9f134e05864f8976e939662a321272db03a85510aa3c"
 client = AgentMail(api_key=api_key)
 
-# Email content
-subject = "Daily Summary: Still App Marketing Strategy & Second Brain Updates"
-
-body = """Hey Aki,
-
-Here's a recap of everything we worked on today:
+recipient = {"email": "aki.b@pentridgemedia.com", "name": "Aki"}
 
-## 🏔️ Second Brain Dashboard
+# Email content, rendered into templates/daily-summary.md
+data = {
+    "title": "Still App Marketing Strategy & Second Brain Updates",
+    "inbox": "agentadzo@agentmail.to",
+    "content": """## 🏔️ Second Brain Dashboard
 
 **Built:**
 - Cron jobs dashboard with live API integration
@@ -109,21 +115,15 @@ Here's a recap of everything we worked on today:
 1. **Content Creation:** Draft 10 video scripts for Adzo (TikTok/IG)
 2. **Still App Workflows:** Set up email-based onboarding/retention flows
 3. **SEO Strategy:** Competitive analysis for meditation apps
-4. **Retention Dashboard:** Track churn metrics and habit formation
-
-Let me know what you want to tackle next!
-
-— Adzo 🏔️
-
-P.S. This email was sent via AgentMail from agentadzo@agentmail.to
-"""
+4. **Retention Dashboard:** Track churn metrics and habit formation""",
+}
 
 # Send the email
 print("Sending summary email...")
-client.inboxes.messages.send(
-    inbox_id="agentadzo@agentmail.to",
-    to="aki.b@pentridgemedia.com",
-    subject=subject,
-    text=body
-)
-print("✅ Email sent to aki.b@pentridgemedia.com")
+with session("send-summary"):
+    result = send_bulk(MailTemplate.load("daily-summary"), [recipient], client=client, shared=data)[0]
+if result["success"]:
+    print(f"✅ Email sent to {recipient['email']}")
+else:
+    print(f"❌ Error: {result['error']}")
+    sys.exit(1)
@@ -0,0 +1,79 @@
+"""Tests for the VTIMEZONE blocks built by lib/ical.py.
+
+Run with: python3 -m unittest discover -s tests
+"""
+import sys
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+from ical import Event, calendar, format_offset
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def observances(ics: str):
+    """(onset, TZOFFSETTO, RRULE) for each STANDARD/DAYLIGHT block"""
+    found, current = [], None
+    for line in ics.split("\r\n"):
+        if line in ("BEGIN:STANDARD", "BEGIN:DAYLIGHT"):
+            current = {"rrule": None}
+        elif current is not None and line.startswith("DTSTART:"):
+            current["onset"] = datetime.strptime(line[8:], "%Y%m%dT%H%M%S")
+        elif current is not None and line.startswith("TZOFFSETTO:"):
+            current["offset"] = line[11:]
+        elif current is not None and line.startswith("RRULE:"):
+            current["rrule"] = line[6:]
+        elif line in ("END:STANDARD", "END:DAYLIGHT"):
+            found.append(current)
+            current = None
+    return found
+
+
+def resolve(ics: str, local: datetime) -> str:
+    """UTC offset the VTIMEZONE assigns to a local time (explicit onsets only)"""
+    onsets = [o for o in observances(ics) if o["onset"] <= local]
+    if not onsets:
+        raise AssertionError(f"no observance in effect at {local}")
+    return max(onsets, key=lambda o: o["onset"])["offset"]
+
+
+def event(start: datetime, rrule=None) -> Event:
+    return Event("Sync", start, start + timedelta(hours=1), tzid="America/New_York", rrule=rrule)
+
+
+class VTimezoneTests(unittest.TestCase):
+    def test_january_event_in_dst_zone_has_an_observance_in_effect(self):
+        start = datetime(2026, 1, 15, 10, tzinfo=NEW_YORK)
+        ics = calendar([event(start)])
+
+        self.assertEqual(resolve(ics, start.replace(tzinfo=None)), "-0500")
+
+    def test_bounded_recurrence_resolves_every_instance(self):
+        start = datetime(2026, 11, 20, 10, tzinfo=NEW_YORK)
+        ics = calendar([event(start, "FREQ=WEEKLY;COUNT=30")])
+
+        for week in range(30):
+            local = start.replace(tzinfo=None) + timedelta(weeks=week)
+            expected = format_offset(local.replace(tzinfo=NEW_YORK).utcoffset())
+            self.assertEqual(resolve(ics, local), expected, local)
+
+    def test_open_ended_recurrence_uses_yearly_rules(self):
+        start = datetime(2026, 6, 1, 9, tzinfo=NEW_YORK)
+        rules = {o["rrule"] for o in observances(calendar([event(start, "FREQ=MONTHLY")]))}
+
+        self.assertIn("FREQ=YEARLY;BYMONTH=3;BYDAY=2SU", rules)
+        self.assertIn("FREQ=YEARLY;BYMONTH=11;BYDAY=1SU", rules)
+
+    def test_zone_without_transitions_is_anchored_before_the_event(self):
+        start = datetime(2026, 1, 1, 0, 30, tzinfo=ZoneInfo("Asia/Tokyo"))
+        ics = calendar([Event("Sync", start, start + timedelta(hours=1), tzid="Asia/Tokyo")])
+
+        self.assertEqual(resolve(ics, start.replace(tzinfo=None)), "+0900")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""Tests for lib/mailer.py against FakeAgentMail.
+
+Run with: python3 -m unittest discover -s tests
+"""
+import json
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+import mailer
+from mailer import FakeAgentMail, MailTemplate, RateLimiter, send_bulk, send_one
+
+MESSAGE = {"subject": "Hi", "text": "Hello"}
+
+
+class SendOneTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(mailer.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_until_success_with_exponential_backoff(self):
+        client = FakeAgentMail(fail_first=2)
+        result = send_one(client, "inbox", "a@example.com", MESSAGE, retries=3, backoff=0.5)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["attempts"], 3)
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [0.5, 1.0])
+        self.assertEqual(len(client.sent), 1)
+
+    def test_gives_up_after_retries(self):
+        client = FakeAgentMail(fail_first=10)
+        result = send_one(client, "inbox", "a@example.com", MESSAGE, retries=2, backoff=1.0)
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["attempts"], 3)
+        self.assertIn("simulated failure", result["error"])
+        # No sleep after the final attempt
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1.0, 2.0])
+        self.assertEqual(client.sent, [])
+
+    def test_first_attempt_success_does_not_sleep(self):
+        client = FakeAgentMail()
+        result = send_one(client, "inbox", "a@example.com", MESSAGE)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["attempts"], 1)
+        self.sleep.assert_not_called()
+
+
+class RateLimiterTests(unittest.TestCase):
+    def test_spaces_calls_by_interval(self):
+        limiter = RateLimiter(rate=20)  # 50 ms apart
+        stamps = []
+        for _ in range(4):
+            limiter.wait()
+            stamps.append(time.monotonic())
+
+        gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+        for gap in gaps:
+            self.assertGreaterEqual(gap, 0.045)
+        self.assertGreaterEqual(stamps[-1] - stamps[0], 0.14)
+
+    def test_zero_rate_is_unlimited(self):
+        limiter = RateLimiter(rate=0)
+        start = time.monotonic()
+        for _ in range(100):
+            limiter.wait()
+        self.assertLess(time.monotonic() - start, 0.05)
+
+
+class TemplateTests(unittest.TestCase):
+    def test_render_substitutes_subject_and_body(self):
+        template = MailTemplate("Hello $name", "Total: ${total}")
+        self.assertEqual(template.render({"name": "Ada", "total": "$3"}),
+                         {"subject": "Hello Ada", "text": "Total: $3"})
+
+    def test_missing_variable_raises(self):
+        template = MailTemplate("Hello $name", "Body $missing")
+        with self.assertRaises(KeyError):
+            template.render({"name": "Ada"})
+
+    def test_send_bulk_reports_template_error_without_sending(self):
+        client = FakeAgentMail()
+        template = MailTemplate("Hello $name", "Code: $code")
+        results = send_bulk(template, [{"email": "a@example.com", "name": "Ada"}],
+                            client=client, rate=0, log_path=None)
+
+        self.assertFalse(results[0]["success"])
+        self.assertEqual(results[0]["attempts"], 0)
+        self.assertIn("template error", results[0]["error"])
+        self.assertEqual(client.sent, [])
+
+    def test_load_requires_subject_line(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "bad.md"
+            path.write_text("No subject here\n\nBody")
+            with self.assertRaises(ValueError):
+                MailTemplate.load(str(path))
+
+
+class DeliveryLogTests(unittest.TestCase):
+    def test_send_bulk_appends_one_line_per_recipient(self):
+        client = FakeAgentMail(fail_first=1)
+        template = MailTemplate("Hi $name", "Hello $name")
+        recipients = [{"email": f"user{i}@example.com", "name": f"User {i}"} for i in range(3)]
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(mailer.time, "sleep"):
+            log_path = Path(tmp) / "mail" / "deliveries.jsonl"
+            results = send_bulk(template, recipients, client=client, rate=0,
+                                retries=2, backoff=0.01, log_path=log_path)
+            send_bulk(template, recipients[:1], client=client, rate=0, log_path=log_path)
+            lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+
+        self.assertEqual(len(lines), 4)
+        # Lines are appended as sends complete, so compare them by recipient
+        first_run = sorted(lines[:3], key=lambda line: line["to"])
+        self.assertEqual([result["to"] for result in results], [r["email"] for r in recipients])
+        for line, result in zip(first_run, results):
+            self.assertEqual(line["to"], result["to"])
+            self.assertTrue(line["success"])
+            self.assertEqual(line["attempts"], 2)
+            self.assertEqual(line["subject"], f"Hi User {line['to'][4]}")
+            self.assertIn("timestamp", line)
+            self.assertIn("latency_ms", line)
+        self.assertEqual(lines[3]["attempts"], 1)
+        self.assertEqual(sorted(m["to"] for m in client.sent),
+                         sorted([r["email"] for r in recipients] + [recipients[0]["email"]]))
+
+    def test_missing_email_is_reported_without_aborting_the_run(self):
+        client = FakeAgentMail()
+        template = MailTemplate("Hi $name", "Hello $name")
+        recipients = [{"email": "a@example.com", "name": "A"}, {"name": "No email"},
+                      {"email": "c@example.com", "name": "C"}]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = Path(tmp) / "deliveries.jsonl"
+            results = send_bulk(template, recipients, client=client, rate=0, log_path=log_path)
+            lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+
+        self.assertEqual([r["success"] for r in results], [True, False, True])
+        self.assertEqual(results[1]["error"], "missing email")
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(sorted(m["to"] for m in client.sent), ["a@example.com", "c@example.com"])
+
+    def test_completed_sends_are_logged_before_a_later_failure(self):
+        template = MailTemplate("Hi", "Hello")
+        recipients = [{"email": f"user{i}@example.com"} for i in range(3)]
+        client = FakeAgentMail()
+
+        def render(data):
+            if data["email"] == "user2@example.com":
+                raise RuntimeError("renderer crashed")
+            return {"subject": "Hi", "text": "Hello"}
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(template, "render", render):
+            log_path = Path(tmp) / "deliveries.jsonl"
+            results = send_bulk(template, recipients, client=client, rate=0,
+                                max_workers=1, log_path=log_path)
+            lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+
+        self.assertEqual([line["success"] for line in lines], [True, True, False])
+        self.assertIn("renderer crashed", results[2]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
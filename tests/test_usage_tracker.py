@@ -0,0 +1,87 @@
+"""Tests for concurrent writers of the usage tracker's files.
+
+Run with: python3 -m unittest discover -s tests
+"""
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+LIB = str(Path(__file__).resolve().parent.parent / "lib")
+sys.path.insert(0, LIB)
+
+# Never touch the real ledger: the module creates a tracker on import
+_USAGE_DIR = tempfile.TemporaryDirectory()
+os.environ["SECOND_BRAIN_USAGE_DIR"] = _USAGE_DIR.name
+
+from usage_tracker import AnomalyDetector, UsageTracker
+
+PROCESSES = 4
+CALLS = 150
+
+
+def log_many(storage_path: str, worker: int):
+    tracker = UsageTracker(storage_path)
+    tracker.auto_compact = False
+    for i in range(CALLS):
+        tracker.log_usage(f"S{worker}", "op", 0.01, {"i": i})
+
+
+def run_workers(target, storage_path: str):
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=target, args=(storage_path, w)) for w in range(PROCESSES)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join(120)
+    return [p.exitcode for p in workers]
+
+
+class ConcurrentLogUsageTests(unittest.TestCase):
+    def test_processes_never_lose_or_corrupt_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(run_workers(log_many, tmp), [0] * PROCESSES)
+
+            tracker = UsageTracker(tmp)
+            day = tracker.get_daily_summary()
+            self.assertEqual(len(day["entries"]), CALLS * PROCESSES)
+            self.assertAlmostEqual(day["daily_total"], 0.01 * CALLS * PROCESSES, places=6)
+            for w in range(PROCESSES):
+                seen = [e["metadata"]["i"] for e in day["entries"] if e["service"] == f"S{w}"]
+                self.assertEqual(seen, list(range(CALLS)))
+            self.assertEqual(list(Path(tmp).glob("*.tmp")), [])
+
+
+def observe_many(storage_path: str, worker: int):
+    detector = AnomalyDetector(Path(storage_path) / "anomaly.json")
+    for i in range(CALLS):
+        detector.observe(f"S{worker}", "op", 0.01, ts=1000.0 + i)
+
+
+class ConcurrentAnomalyStateTests(unittest.TestCase):
+    def test_processes_keep_each_others_streams(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(run_workers(observe_many, tmp), [0] * PROCESSES)
+
+            state = json.loads((Path(tmp) / "anomaly.json").read_text())
+            self.assertEqual(sorted(state), [f"S{w}|op" for w in range(PROCESSES)])
+            for stream in state.values():
+                self.assertEqual(stream["count"], CALLS)
+            self.assertEqual(list(Path(tmp).glob("*.tmp")), [])
+
+    def test_save_failure_does_not_raise(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            blocker = Path(tmp) / "not-a-dir"
+            blocker.write_text("")
+            detector = AnomalyDetector(blocker / "anomaly.json")
+            with mock.patch("builtins.print") as warn:
+                self.assertEqual(detector.observe("S", "op", 0.01), [])
+            self.assertIn("Anomaly state not saved", warn.call_args.args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
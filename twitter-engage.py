@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Twitter engagement automation - replies and original tweets.
-Usage: python3 twitter-engage.py [--type reply|original]
+Usage: python3 twitter-engage.py [--type reply|original] [--profile[=cpu,mem]]
 """
 
 import json
@@ -11,6 +11,10 @@ import random
 from pathlib import Path
 import tweepy
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "lib"))
+
+from tracing import session, span
+
 def load_state():
     """Load current state from twitter-state.json"""
     state_file = Path.home() / "clawd" / "twitter-state.json"
@@ -70,21 +74,25 @@ def main():
         sys.exit(1)
     
     # Initialize client
-    client = get_twitter_client()
+    with span("twitter.client"):
+        client = get_twitter_client()
     
     # Post based on type
     if tweet_type == "reply":
         if not tweet_id:
             print(json.dumps({"error": "No tweet_id provided for reply"}))
             sys.exit(1)
-        response = post_reply(client, tweet_id, tweet_text)
+        with span("twitter.create_tweet", type="reply"):
+            response = post_reply(client, tweet_id, tweet_text)
         post_type = "reply"
     else:
-        response = post_original(client, tweet_text)
+        with span("twitter.create_tweet", type="original"):
+            response = post_original(client, tweet_text)
         post_type = "original"
     
     # Update state
-    state = load_state()
+    with span("twitter.load_state"):
+        state = load_state()
     state["lastPostTimestamp"] = int(time.time())
     state["lastPostType"] = post_type
     state["lastPostUrl"] = f"https://twitter.com/user/status/{response.data['id']}"
@@ -98,7 +106,8 @@ def main():
     state["todayTotalCount"] = state.get("todayTotalCount", 0) + 1
     state["monthlyTotal"] = state.get("monthlyTotal", 0) + 1
     
-    save_state(state)
+    with span("twitter.save_state"):
+        save_state(state)
     
     # Return success
     print(json.dumps({
@@ -109,4 +118,5 @@ def main():
     }))
 
 if __name__ == "__main__":
-    main()
+    with session("twitter-engage"):
+        main()
@@ -6,8 +6,14 @@ Usage: python3 twitter-exa-search.py "query" [num_results]
 
 import sys
 import json
+from pathlib import Path
+
 import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "lib"))
+
+from tracing import session
+
 def search_tweets(query, num_results=10):
     """Search for tweets using Exa API."""
     url = "https://api.exa.ai/search"
@@ -38,12 +44,13 @@ def search_tweets(query, num_results=10):
         }
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python3 twitter-exa-search.py 'query' [num_results]")
-        sys.exit(1)
+    with session("twitter-exa-search"):
+        if len(sys.argv) < 2:
+            print("Usage: python3 twitter-exa-search.py 'query' [num_results]")
+            sys.exit(1)
     
-    query = sys.argv[1]
-    num_results = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+        query = sys.argv[1]
+        num_results = int(sys.argv[2]) if len(sys.argv) > 2 else 10
     
-    results = search_tweets(query, num_results)
-    print(json.dumps(results, indent=2))
+        results = search_tweets(query, num_results)
+        print(json.dumps(results, indent=2))
@@ -5,63 +5,95 @@ Checks conditions before posting, tracks state.
 """
 
 import json
-import tweepy
+import os
+import sys
 from datetime import datetime, timezone
-import pytz
-
-# Load credentials
-with open('/Users/adzoboateng/.config/twitter/credentials.json', 'r') as f:
-    creds = json.load(f)
-
-# Load state
-with open('/Users/adzoboateng/clawd/twitter-state.json', 'r') as f:
-    state = json.load(f)
-
-# Authenticate
-client = tweepy.Client(
-    bearer_token=creds['bearer_token'],
-    consumer_key=creds['api_key'],
-    consumer_secret=creds['api_key_secret'],
-    access_token=creds['access_token'],
-    access_token_secret=creds['access_token_secret']
-)
-
-# For media upload (v1.1 API)
-auth = tweepy.OAuth1UserHandler(
-    creds['api_key'],
-    creds['api_key_secret'],
-    creds['access_token'],
-    creds['access_token_secret']
-)
-api = tweepy.API(auth)
-
-def check_conditions():
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "lib"))
+
+from tracing import session
+
+CREDENTIALS_FILE = Path('/Users/adzoboateng/.config/twitter/credentials.json')
+STATE_FILE = Path('/Users/adzoboateng/clawd/twitter-state.json')
+EASTERN = ZoneInfo('America/New_York')
+
+_clients = None
+
+
+def load_state():
+    """Load posting state from twitter-state.json"""
+    with open(STATE_FILE, 'r') as f:
+        return json.load(f)
+
+
+def save_state(state):
+    """Save posting state (write-then-rename so it is never truncated)"""
+    tmp = STATE_FILE.with_suffix(".json.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+
+def get_clients():
+    """Return (v2 client, v1.1 API), authenticating on first use"""
+    global _clients
+    if _clients is None:
+        import tweepy
+
+        with open(CREDENTIALS_FILE, 'r') as f:
+            creds = json.load(f)
+
+        # Authenticate
+        client = tweepy.Client(
+            bearer_token=creds['bearer_token'],
+            consumer_key=creds['api_key'],
+            consumer_secret=creds['api_key_secret'],
+            access_token=creds['access_token'],
+            access_token_secret=creds['access_token_secret']
+        )
+
+        # For media upload (v1.1 API)
+        auth = tweepy.OAuth1UserHandler(
+            creds['api_key'],
+            creds['api_key_secret'],
+            creds['access_token'],
+            creds['access_token_secret']
+        )
+        _clients = (client, tweepy.API(auth))
+    return _clients
+
+
+def check_conditions(state=None):
     """Check if conditions are met for posting."""
-    eastern = pytz.timezone('America/New_York')
-    now = datetime.now(eastern)
-    
+    state = state if state is not None else load_state()
+    now = datetime.now(EASTERN)
+
     # Check active hours (8 AM - 10 PM EST)
     if now.hour < 8 or now.hour >= 22:
         return False, "Outside active hours (8 AM - 10 PM EST)"
-    
+
     # Check time since last post (>3 hours)
-    if state['lastPostTimestamp'] > 0:
+    if state.get('lastPostTimestamp', 0) > 0:
         last_post = datetime.fromtimestamp(state['lastPostTimestamp'], tz=timezone.utc)
         hours_since = (datetime.now(timezone.utc) - last_post).total_seconds() / 3600
         if hours_since < 3:
             return False, f"Only {hours_since:.1f} hours since last post (need 3+)"
-    
+
     return True, "Conditions met"
 
+
 def post_tweet(text, media_path=None, reply_to=None):
     """Post a tweet with optional media."""
+    client, api = get_clients()
     media_ids = []
-    
+
     # Upload media if provided
     if media_path:
         media = api.media_upload(media_path)
         media_ids = [media.media_id]
-    
+
     # Post tweet
     if reply_to:
         response = client.create_tweet(
@@ -74,29 +106,29 @@ def post_tweet(text, media_path=None, reply_to=None):
             text=text,
             media_ids=media_ids if media_ids else None
         )
-    
+
     # Update state
-    eastern = pytz.timezone('America/New_York')
-    now = datetime.now(eastern)
-    today = now.strftime('%Y-%m-%d')
-    
-    if state['todayDate'] != today:
+    state = load_state()
+    today = datetime.now(EASTERN).strftime('%Y-%m-%d')
+
+    if state.get('todayDate') != today:
         state['todayDate'] = today
         state['todayPostCount'] = 0
-    
+
     state['lastPostTimestamp'] = datetime.now(timezone.utc).timestamp()
     state['lastPostType'] = 'reply' if reply_to else 'original'
-    state['todayPostCount'] += 1
-    state['totalPosts'] += 1
-    
-    # Save state
-    with open('/Users/adzoboateng/clawd/twitter-state.json', 'w') as f:
-        json.dump(state, f, indent=2)
-    
+    state['todayPostCount'] = state.get('todayPostCount', 0) + 1
+    state['totalPosts'] = state.get('totalPosts', 0) + 1
+
+    save_state(state)
+
     return response
 
+
 if __name__ == '__main__':
-    can_post, reason = check_conditions()
-    print(f"Can post: {can_post}")
-    print(f"Reason: {reason}")
-    print(f"State: {json.dumps(state, indent=2)}")
+    with session("twitter-post"):
+        state = load_state()
+        can_post, reason = check_conditions(state)
+        print(f"Can post: {can_post}")
+        print(f"Reason: {reason}")
+        print(f"State: {json.dumps(state, indent=2)}")